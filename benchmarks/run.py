@@ -0,0 +1,414 @@
+"""
+Нагрузочные замеры роутов API на синтетических данных.
+
+Скрипт заполняет БД генератором из src.datagen, прогоняет каждый роут
+приложения внутри процесса через ASGI-транспорт httpx и сохраняет p50/p99
+задержки, пропускную способность и количество SQL-запросов на один
+HTTP-запрос в JSON. Режим --compare сравнивает результат с сохраненным
+ранее и завершается с кодом 1 при регрессиях.
+
+Пример:
+    python -m benchmarks.run --size medium --output baseline.json
+    python -m benchmarks.run --size medium --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.cache import response_cache
+from src.datagen import DatasetSpec, load_dataset
+from src.db_connect import get_db, get_sessionmaker
+from src.employee.model import Employee
+from src.tasks.model import Task
+
+SIZES = {
+    'small': DatasetSpec(employees=100, tasks=1000),
+    'medium': DatasetSpec(employees=2000, tasks=100000),
+    'large': DatasetSpec(employees=20000, tasks=1000000),
+}
+
+# Роуты, которые не относятся к API и не замеряются
+IGNORED_ROUTES = {'/openapi.json', '/docs', '/docs/oauth2-redirect', '/redoc',
+                  # Бесконечный поток событий: ответ не завершается
+                  '/events',
+                  # Служебный роут, закрыт токеном METRICS_TOKEN
+                  '/metrics/pool'}
+
+SYNC_DRIVERS = {'sqlite+aiosqlite': 'sqlite',
+                'postgresql+asyncpg': 'postgresql+psycopg2'}
+
+
+class Context:
+    """Общие данные сценариев: выборка существующих id и счетчик уникальности."""
+
+    def __init__(self, task_ids: list, employee_ids: list):
+        self.task_ids = task_ids
+        self.employee_ids = employee_ids
+        self.counter = 0
+
+    def unique(self) -> str:
+        self.counter += 1
+        return f'{uuid.uuid4().hex}-{self.counter}'
+
+    def task_id(self, i: int) -> str:
+        return str(self.task_ids[i % len(self.task_ids)])
+
+    def employee_id(self, i: int) -> str:
+        return str(self.employee_ids[i % len(self.employee_ids)])
+
+
+def task_payload(ctx: Context) -> dict:
+    return {'name': f'Bench {ctx.unique()}', 'content': 'Нагрузочный тест'}
+
+
+def employee_payload(ctx: Context) -> dict:
+    return {'first_name': 'Bench', 'last_name': 'Employee',
+            'email': f'bench-{ctx.unique()}@example.com'}
+
+
+async def create_tasks(client: httpx.AsyncClient, ctx: Context,
+                       count: int) -> list[str]:
+    ids = []
+    for _ in range(count):
+        response = await client.post('/tasks/create/', json=task_payload(ctx))
+        ids.append(response.json()['task']['id'])
+    return ids
+
+
+async def create_employees(client: httpx.AsyncClient, ctx: Context,
+                           count: int) -> list[str]:
+    ids = []
+    for _ in range(count):
+        response = await client.post('/employees/create',
+                                     json=employee_payload(ctx))
+        ids.append(response.json()['employee']['id'])
+    return ids
+
+
+def _get(path):
+    async def prepare(client, ctx, count):
+        return lambda i: ('GET', path(ctx, i) if callable(path) else path, {})
+    return prepare
+
+
+async def _prepare_update_task(client, ctx, count):
+    return lambda i: ('PATCH', f'/tasks/update/{ctx.task_id(i)}',
+                      {'params': task_payload(ctx)})
+
+
+async def _prepare_delete_task(client, ctx, count):
+    ids = await create_tasks(client, ctx, count)
+    return lambda i: ('DELETE', f'/tasks/del/{ids[i]}', {})
+
+
+async def _prepare_update_employee(client, ctx, count):
+    return lambda i: ('PATCH', f'/employees/update/{ctx.employee_id(i)}',
+                      {'params': employee_payload(ctx)})
+
+
+async def _prepare_delete_employee(client, ctx, count):
+    ids = await create_employees(client, ctx, count)
+    return lambda i: ('DELETE', f'/employees/del/{ids[i]}', {})
+
+
+async def _prepare_offboard_employees(client, ctx, count):
+    ids = await create_employees(client, ctx, count * 10)
+    return lambda i: ('POST', '/employees/offboard',
+                      {'json': {'employee_ids': ids[i * 10:(i + 1) * 10]}})
+
+
+async def _prepare_drain_employee(client, ctx, count):
+    return lambda i: ('POST', f'/employees/{ctx.employee_id(i)}/drain', {})
+
+
+async def _prepare_get_drain_job(client, ctx, count):
+    response = await client.post(f'/employees/{ctx.employee_id(0)}/drain')
+    job_id = response.json()['job']['id']
+    return lambda i: ('GET', f'/employees/drain/{job_id}', {})
+
+
+async def _prepare_create_task(client, ctx, count):
+    return lambda i: ('POST', '/tasks/create/', {'json': task_payload(ctx)})
+
+
+async def _prepare_create_employee(client, ctx, count):
+    return lambda i: ('POST', '/employees/create',
+                      {'json': employee_payload(ctx)})
+
+
+async def _prepare_bulk_tasks(client, ctx, count):
+    return lambda i: ('POST', '/tasks/bulk',
+                      {'json': [task_payload(ctx) for _ in range(100)]})
+
+
+async def _prepare_bulk_employees(client, ctx, count):
+    return lambda i: ('POST', '/employees/bulk',
+                      {'json': [employee_payload(ctx) for _ in range(100)]})
+
+
+async def _prepare_set_employee(client, ctx, count):
+    return lambda i: ('PATCH', f'/tasks/set_employee/{ctx.task_id(i)}', {})
+
+
+async def _prepare_set_employee_batch(client, ctx, count):
+    return lambda i: ('PATCH', '/tasks/set_employee/batch',
+                      {'json': {'task_ids': [ctx.task_id(i * 10 + j)
+                                             for j in range(10)]}})
+
+
+# Сценарии по ключу "МЕТОД путь"; каждый сценарий готовит данные
+# (не входит в замер) и возвращает функцию i -> (метод, url, kwargs)
+SCENARIOS = {
+    'GET /': _get('/'),
+    'GET /employees/': _get('/employees/'),
+    'GET /employees/export': _get('/employees/export'),
+    'GET /employees/get/{employeeId}':
+        _get(lambda ctx, i: f'/employees/get/{ctx.employee_id(i)}'),
+    'POST /employees/create': _prepare_create_employee,
+    'POST /employees/bulk': _prepare_bulk_employees,
+    'PATCH /employees/update/{employeeId}': _prepare_update_employee,
+    'DELETE /employees/del/{employeeId}': _prepare_delete_employee,
+    'POST /employees/offboard': _prepare_offboard_employees,
+    'POST /employees/{employeeId}/drain': _prepare_drain_employee,
+    'GET /employees/drain/{jobId}': _prepare_get_drain_job,
+    'GET /employees/busy': _get('/employees/busy'),
+    'GET /employees/free': _get('/employees/free'),
+    'GET /tasks/': _get('/tasks/'),
+    'GET /tasks/export': _get('/tasks/export'),
+    'GET /tasks/due': _get('/tasks/due?overdue=true'),
+    'GET /tasks/search': _get(lambda ctx, i: f'/tasks/search?q=bench+{i}'),
+    'GET /tasks/get/{taskId}':
+        _get(lambda ctx, i: f'/tasks/get/{ctx.task_id(i)}'),
+    'GET /tasks/{taskId}/subtree':
+        _get(lambda ctx, i: f'/tasks/{ctx.task_id(i)}/subtree'),
+    'GET /tasks/{taskId}/ancestors':
+        _get(lambda ctx, i: f'/tasks/{ctx.task_id(i)}/ancestors'),
+    'POST /tasks/create/': _prepare_create_task,
+    'POST /tasks/bulk': _prepare_bulk_tasks,
+    'PATCH /tasks/update/{taskId}': _prepare_update_task,
+    'DELETE /tasks/del/{taskId}': _prepare_delete_task,
+    'GET /tasks/important': _get('/tasks/important'),
+    'GET /tasks/free': _get('/tasks/free'),
+    'PATCH /tasks/set_employee/batch': _prepare_set_employee_batch,
+    'PATCH /tasks/set_employee/{taskId}': _prepare_set_employee,
+    'GET /metrics': _get('/metrics'),
+}
+
+
+def app_routes(app) -> set[str]:
+    """Ключи "МЕТОД путь" всех роутов приложения."""
+    keys = set()
+    for route in app.routes:
+        if route.path in IGNORED_ROUTES:
+            continue
+        for method in getattr(route, 'methods', None) or ():
+            if method != 'HEAD':
+                keys.add(f'{method} {route.path}')
+    return keys
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(client, ctx, prepare, requests: int,
+                       concurrency: int, statements: list[int]) -> dict:
+    make_request = await prepare(client, ctx, requests)
+    latencies = []
+    errors = 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            method, url, kwargs = make_request(i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                errors += 1
+
+    statements_before = statements[0]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'throughput_rps': requests / elapsed,
+        'statements_per_request':
+            (statements[0] - statements_before) / requests,
+    }
+
+
+def seed_database(url: str, spec: DatasetSpec) -> None:
+    parsed = make_url(url)
+    sync_url = parsed.set(drivername=SYNC_DRIVERS.get(parsed.drivername,
+                                                      parsed.drivername))
+    load_dataset(create_engine(sync_url), spec)
+
+
+async def sample_ids(session_factory, model, limit: int = 1000) -> list:
+    async with session_factory() as db:
+        result = await db.execute(
+            select(model.id).order_by(func.random()).limit(limit))
+        return list(result.scalars().all())
+
+
+async def benchmark(app, url: str, requests: int, concurrency: int,
+                    only: list[str] | None) -> dict:
+    engine = create_async_engine(url, poolclass=NullPool)
+    session_factory = async_sessionmaker(bind=engine, autoflush=False,
+                                         expire_on_commit=False)
+
+    statements = [0]
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def count_statement(*args):
+        statements[0] += 1
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = lambda: session_factory
+    # Кэш карточек мог остаться от другой БД
+    response_cache.clear()
+
+    ctx = Context(await sample_ids(session_factory, Task),
+                  await sample_ids(session_factory, Employee))
+    missing = sorted(app_routes(app) - SCENARIOS.keys())
+    if missing:
+        print(f'Нет сценариев для роутов: {", ".join(missing)}',
+              file=sys.stderr)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url='http://bench') as client:
+        # Сначала чтение, затем запись: пишущие сценарии меняют данные
+        scenarios = sorted(SCENARIOS.items(),
+                           key=lambda item: not item[0].startswith('GET '))
+        for name, prepare in scenarios:
+            if only and name not in only:
+                continue
+            results[name] = await run_scenario(client, ctx, prepare, requests,
+                                               concurrency, statements)
+            print(f'{name:45} p50={results[name]["p50_ms"]:8.2f}ms '
+                  f'p99={results[name]["p99_ms"]:8.2f}ms '
+                  f'rps={results[name]["throughput_rps"]:8.1f} '
+                  f'sql={results[name]["statements_per_request"]:.1f}')
+    await engine.dispose()
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Сравнение результатов с базовыми.
+
+    Attributes:
+    -----------
+    baseline : dict Результаты предыдущего запуска.
+    current : dict  Результаты текущего запуска.
+    threshold : float   Допустимый относительный рост задержек.
+
+    Returns:
+    --------
+    list[str]   Описания регрессий.
+    """
+    regressions = []
+    for name, result in current['routes'].items():
+        base = baseline['routes'].get(name)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if result[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {metric} {base[metric]:.2f} -> '
+                    f'{result[metric]:.2f}')
+        if result['statements_per_request'] > base['statements_per_request']:
+            regressions.append(
+                f'{name}: SQL-запросов {base["statements_per_request"]:.1f} '
+                f'-> {result["statements_per_request"]:.1f}')
+        if result['errors'] > base['errors']:
+            regressions.append(
+                f'{name}: ошибок {base["errors"]} -> {result["errors"]}')
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', choices=SIZES, default='small',
+                        help='размер набора данных')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help='async SQLAlchemy URL БД для замеров '
+                                      '(по умолчанию - временный SQLite)')
+    parser.add_argument('--reuse', action='store_true',
+                        help='не заполнять БД, использовать имеющиеся данные')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='количество запросов на роут')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='количество одновременных запросов')
+    parser.add_argument('--route', action='append',
+                        help='замерить только указанный роут, '
+                             'например "GET /tasks/"')
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='сравнить с сохраненными результатами')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='допустимый рост задержек при сравнении')
+    args = parser.parse_args(argv)
+
+    spec = SIZES[args.size]
+    spec.seed = args.seed
+    url = args.url
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        url = f'sqlite+aiosqlite:///{path}'
+    if not args.reuse:
+        seed_database(url, spec)
+
+    from main import app
+    current = {
+        'meta': {'size': args.size, 'employees': spec.employees,
+                 'tasks': spec.tasks, 'seed': args.seed,
+                 'requests': args.requests,
+                 'concurrency': args.concurrency,
+                 'dialect': make_url(url).get_backend_name(),
+                 'created': datetime.now(timezone.utc).isoformat()},
+        'routes': asyncio.run(benchmark(app, url, args.requests,
+                                        args.concurrency, args.route)),
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(current, file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, current, args.threshold)
+        for regression in regressions:
+            print(f'РЕГРЕССИЯ {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,29 +1,63 @@
-import psycopg2
+import argparse
+import time
 
-from src.db_connect import DB_NAME, DB_USER, DB_PASS, DB_HOST
+from sqlalchemy import create_engine
 
-conn = psycopg2.connect(
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASS,
-    host=DB_HOST
-)
-cursor = conn.cursor()
+from src.datagen import DatasetSpec, load_dataset
+from src.db_connect import DATABASE_URL
 
 
-def fill_database():
-    with open('test_data.sql', 'r', encoding='utf-8') as file:
+def fill_database(engine, sql_file: str = 'test_data.sql'):
+    """Заполнение БД фиксированными тестовыми данными из sql-файла"""
+    with open(sql_file, 'r', encoding='utf-8') as file:
         sql_script = file.read()
 
     try:
-        cursor.execute(sql_script)
-        conn.commit()
+        with engine.begin() as conn:
+            conn.exec_driver_sql(sql_script)
         print("Тестовые данные успешно добавлены в базу данных.")
     except Exception as e:
         print(f"Ошибка заполнения базы данных: {e}")
 
 
-if __name__ == '__main__':
-    fill_database()
+def main():
+    parser = argparse.ArgumentParser(
+        description='Заполнение БД тестовыми или синтетическими данными')
+    parser.add_argument('--url', default=DATABASE_URL,
+                        help='SQLAlchemy URL синхронного подключения к БД '
+                             '(по умолчанию - PostgreSQL из .env)')
+    parser.add_argument('--sql', metavar='FILE',
+                        help='загрузить фиксированные данные из sql-файла, '
+                             'например test_data.sql')
+    parser.add_argument('--employees', type=int, default=1000,
+                        help='количество сотрудников')
+    parser.add_argument('--tasks', type=int, default=10000,
+                        help='количество задач')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='зерно генератора для воспроизводимых наборов')
+    parser.add_argument('--child-ratio', type=float, default=0.6,
+                        help='доля дочерних задач')
+    parser.add_argument('--assigned-ratio', type=float, default=0.7,
+                        help='доля назначенных задач')
+    parser.add_argument('--skew', type=float, default=2.0,
+                        help='перекос распределения задач по сотрудникам')
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if args.sql:
+        fill_database(engine, args.sql)
+        return
+
+    spec = DatasetSpec(employees=args.employees, tasks=args.tasks,
+                       seed=args.seed, child_ratio=args.child_ratio,
+                       assigned_ratio=args.assigned_ratio, skew=args.skew)
+    started = time.perf_counter()
+    load_dataset(engine, spec)
+    elapsed = time.perf_counter() - started
+    rows = args.employees + args.tasks
+    print(f"Загружено {args.employees} сотрудников и {args.tasks} задач "
+          f"за {elapsed:.1f} с ({rows / elapsed * 60:,.0f} строк/мин).")
+
 
-conn.close()
+if __name__ == '__main__':
+    main()
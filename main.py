@@ -1,28 +1,68 @@
-import uvicorn
-from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session, joinedload
+import asyncio
+from contextlib import asynccontextmanager
 
-from src.db_connect import create_db, engine, get_db, DB_HOST
-from src.employee.model import Base, Employee
-from src.employee.services import api_employee, count_tasks
+from fastapi import FastAPI, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db_connect import (engine, async_engine, get_db, DB_HOST,
+                            DB_MIGRATE_ON_STARTUP, ASYNC_DATABASE_URL)
+from src.employee.schema import EmployeeWorkloadList
+from src.employee.services import (api_employee, employees_workload_query,
+                                   workload_etag)
+from src.events import api_events, PostgresEventListener
+from src.metrics import SQLMetricsMiddleware, api_metrics, instrument_engine
+from src.migrations import is_migrated, migrate
+from src.pagination import paginate
+from src.serialization import ORJSONResponse
 from src.tasks.services import api_task
+from src.versioning import etag_matches, not_modified
+
+instrument_engine(async_engine)
+events_listener = PostgresEventListener(ASYNC_DATABASE_URL)
+
 
-create_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Обновление схемы БД при старте (если она еще не применена), подписка
+    на события других воркеров и закрытие пула
+    """
+    if DB_MIGRATE_ON_STARTUP and not await asyncio.to_thread(is_migrated,
+                                                             engine):
+        await asyncio.to_thread(migrate, engine)
+    events_listener.start()
+    yield
+    await events_listener.stop()
+    await async_engine.dispose()
 
-Base.metadata.create_all(bind=engine)
-app = FastAPI(title="Трекер задач сотрудников",)
+
+app = FastAPI(title="Трекер задач сотрудников",
+              default_response_class=ORJSONResponse,
+              lifespan=lifespan)
+app.add_middleware(SQLMetricsMiddleware)
 app.include_router(api_employee)
 app.include_router(api_task)
+app.include_router(api_metrics)
+app.include_router(api_events)
 
 
-@app.get('/')
-def root(db: Session = Depends(get_db)):
-    employees = db.query(Employee).options(joinedload(Employee.tasks)).all()
-    employees = sorted(employees, key=count_tasks, reverse=True)
-    return {'status': 'success',
-            'results': len(employees),
-            'employees': employees}
+@app.get('/', response_model=EmployeeWorkloadList)
+async def root(request: Request,
+               db: AsyncSession = Depends(get_db),
+               limit: int | None = None, page: int = 1):
+    etag = await workload_etag(db, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    result = await db.execute(
+        paginate(employees_workload_query(), limit, page))
+    employees = result.mappings().all()
+    return ORJSONResponse({'status': 'success',
+                           'results': len(employees),
+                           'employees': employees},
+                          headers={'ETag': etag})
 
 
 if __name__ == '__main__':
+    import uvicorn
+
     uvicorn.run(app, host=DB_HOST, port=8000)
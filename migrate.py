@@ -0,0 +1,37 @@
+import argparse
+
+from sqlalchemy import create_engine
+
+from src.db_connect import DATABASE_URL, create_db
+from src.migrations import migrate
+from src.tasks.counters import repair_task_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Создание и обновление схемы БД (один раз на деплой)')
+    parser.add_argument('--url', default=DATABASE_URL,
+                        help='SQLAlchemy URL синхронного подключения к БД '
+                             '(по умолчанию - PostgreSQL из .env)')
+    parser.add_argument('--create-database', action='store_true',
+                        help='создать БД из .env, если ее нет '
+                             '(нужны права на CREATE DATABASE)')
+    parser.add_argument('--repair-task-counts', action='store_true',
+                        help='пересчитать счетчики задач сотрудников '
+                             '(active_task_count) по таблице задач')
+    args = parser.parse_args()
+
+    if args.create_database:
+        create_db()
+    engine = create_engine(args.url)
+    if migrate(engine):
+        print('Схема БД обновлена.')
+    else:
+        print('Схема БД актуальна.')
+    if args.repair_task_counts:
+        with engine.begin() as conn:
+            print(f'Исправлено счетчиков задач: {repair_task_counts(conn)}')
+
+
+if __name__ == '__main__':
+    main()
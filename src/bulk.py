@@ -0,0 +1,121 @@
+import json
+from typing import Any, AsyncIterator
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Количество строк в одном многострочном INSERT
+BULK_CHUNK_SIZE = 1000
+
+# Размер пачки идентификаторов в IN (...), чтобы не упереться
+# в ограничение драйверов на количество параметров запроса
+ID_CHUNK_SIZE = 5000
+
+
+async def iter_json_rows(request: Request) -> AsyncIterator[tuple[int, Any]]:
+    """
+    Чтение строк тела запроса: JSON-массива или NDJSON.
+
+    NDJSON (Content-Type: application/x-ndjson) читается из потока
+    построчно, поэтому память не зависит от размера загрузки.
+
+    Attributes:
+    -----------
+    request : Request   Входящий запрос.
+
+    Returns:
+    --------
+    AsyncIterator[tuple[int, Any]]  Номер строки и ее содержимое.
+    """
+    content_type = request.headers.get('content-type', '')
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        index = 0
+        buffer = b''
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail='Тело запроса не является корректным JSON')
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail='Ожидается массив объектов')
+    for index, row in enumerate(rows):
+        yield index, row
+
+
+async def iter_valid_chunks(
+        request: Request,
+        schema: type[BaseModel],
+        errors: list[dict]) -> AsyncIterator[list[tuple[int, BaseModel]]]:
+    """
+    Валидация строк тела запроса и разбиение их на пачки.
+
+    Строки, не прошедшие валидацию, не прерывают загрузку, а попадают
+    в errors с указанием номера строки.
+
+    Attributes:
+    -----------
+    request : Request   Входящий запрос.
+    schema : type[BaseModel]    Схема для валидации строки.
+    errors : list[dict] Список, в который добавляются ошибки по строкам.
+
+    Returns:
+    --------
+    AsyncIterator[list[tuple[int, BaseModel]]]  Пачки (номер строки, схема).
+    """
+    chunk = []
+    async for index, raw in iter_json_rows(request):
+        try:
+            if isinstance(raw, bytes):
+                item = schema.model_validate_json(raw)
+            else:
+                item = schema.model_validate(raw)
+        except ValidationError as e:
+            errors.append({'index': index,
+                           'detail': json.loads(e.json(include_url=False))})
+            continue
+        chunk.append((index, item))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def insert_ignore_conflicts(db: AsyncSession, model: type,
+                                  rows: list[dict]) -> set:
+    """
+    Многострочный INSERT ... ON CONFLICT DO NOTHING RETURNING id.
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    model : type    Модель SQLAlchemy с колонкой id.
+    rows : list[dict]   Строки для вставки (id заполнен заранее).
+
+    Returns:
+    --------
+    set Идентификаторы вставленных строк; остальные строки конфликтуют
+        с уже существующими по уникальным полям.
+    """
+    if not rows:
+        return set()
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    result = await db.execute(
+        insert(model).values(rows).on_conflict_do_nothing().
+        returning(model.id))
+    return set(result.scalars().all())
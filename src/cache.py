@@ -0,0 +1,168 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable
+from uuid import UUID
+
+from fastapi import Response
+
+from src.metrics import collectors
+
+# Размер и время жизни кэша карточек задач и сотрудников.
+# CACHE_TTL=0 отключает кэш
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+CACHE_TTL = float(os.getenv('CACHE_TTL', 30))
+
+
+class CacheBackend(ABC):
+    """
+    Интерфейс кэша сериализованных ответов.
+
+    Запись кэша помечается тегами - ключами сущностей, из которых
+    собран ответ. Инвалидация по тегу удаляет все записи, в которые
+    вошла измененная сущность. Общий для воркеров бэкенд (например,
+    Redis) должен реализовать те же методы.
+    """
+
+    @abstractmethod
+    def version(self) -> int:
+        """Номер поколения кэша, увеличивается при каждой инвалидации."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Значение по ключу или None, если его нет или оно устарело."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (),
+            version: int | None = None) -> None:
+        """
+        Сохранение значения.
+
+        Если передан version и с тех пор была инвалидация, значение
+        не сохраняется: оно могло быть прочитано до изменения данных.
+        """
+
+    @abstractmethod
+    def invalidate(self, *tags: str) -> None:
+        """Удаление всех записей, помеченных любым из тегов."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Удаление всех записей."""
+
+
+class LRUCache(CacheBackend):
+    """
+    Кэш в памяти процесса с вытеснением давно неиспользуемых записей и TTL.
+
+    Attributes:
+    -----------
+    max_entries : int   Максимальное количество записей.
+    ttl : float         Время жизни записи в секундах (0 - кэш отключен).
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES,
+                 ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._version = 0
+        self._entries: OrderedDict[str, tuple[float, bytes, frozenset]] = \
+            OrderedDict()
+        self._tagged: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            self._remove(key)
+            self.evictions += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (),
+            version: int | None = None) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        if version is not None and version != self._version:
+            return
+        self._remove(key)
+        tags = frozenset((key, *tags))
+        self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, *tags: str) -> None:
+        self._version += 1
+        for tag in tags:
+            for key in list(self._tagged.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self._version += 1
+        self._entries.clear()
+        self._tagged.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def collect(self) -> Iterable[str]:
+        """Счетчики кэша в текстовом формате Prometheus."""
+        for name, documentation, value in (
+                ('hits', 'Попадания в кэш ответов', self.hits),
+                ('misses', 'Промахи кэша ответов', self.misses),
+                ('evictions', 'Записи, вытесненные по размеру или TTL',
+                 self.evictions),
+                ('invalidations', 'Записи, удаленные при изменении данных',
+                 self.invalidations)):
+            yield f'# HELP response_cache_{name} {documentation}'
+            yield f'# TYPE response_cache_{name} counter'
+            yield f'response_cache_{name}_total {value}'
+        yield '# HELP response_cache_entries Количество записей в кэше ответов'
+        yield '# TYPE response_cache_entries gauge'
+        yield f'response_cache_entries {len(self)}'
+
+
+def task_key(task_id: UUID | None) -> str:
+    """Ключ (и тег) кэша для задачи."""
+    return f'task:{task_id}'
+
+
+def employee_key(employee_id: UUID | None) -> str:
+    """Ключ (и тег) кэша для сотрудника."""
+    return f'employee:{employee_id}'
+
+
+def cached_response(body: bytes) -> Response:
+    """Ответ из сериализованного тела."""
+    return Response(content=body, media_type='application/json')
+
+
+response_cache = LRUCache()
+collectors.append(response_cache.collect)
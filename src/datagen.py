@@ -0,0 +1,264 @@
+import io
+import random
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from sqlalchemy import Engine, Table
+
+from src.employee.model import Employee
+from src.migrations import migrate
+from src.tasks.model import Task
+from src.versioning import bump_statement
+
+LAST_NAMES = ['Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов',
+              'Васильев', 'Соколов', 'Михайлов', 'Новиков', 'Федоров']
+FIRST_NAMES = ['Иван', 'Петр', 'Сергей', 'Андрей', 'Алексей', 'Дмитрий',
+               'Михаил', 'Николай', 'Павел', 'Олег']
+PATRONYMICS = ['Иванович', 'Петрович', 'Сергеевич', 'Андреевич', None]
+POSTS = ['Инженер', 'Программист', 'Аналитик', 'Тестировщик',
+         'Руководитель проекта', None]
+
+
+class DatasetSpec:
+    """
+    Параметры синтетического набора данных.
+
+    Attributes:
+    -----------
+    employees : int     Количество сотрудников.
+    tasks : int         Количество задач.
+    seed : int          Зерно генератора случайных чисел.
+    child_ratio : float Доля задач, имеющих родительскую задачу.
+    max_depth : int     Максимальная глубина дерева задач.
+    parent_window : int Сколько последних задач может стать родительской.
+    assigned_ratio : float  Доля задач, назначенных сотрудникам.
+    skew : float        Перекос назначения: чем больше, тем сильнее задачи
+                        концентрируются на небольшой группе сотрудников.
+    no_deadline_ratio : float   Доля задач без срока выполнения.
+    start : datetime    Начало диапазона сроков выполнения.
+    days : int          Длина диапазона сроков выполнения в днях.
+    """
+
+    def __init__(self, employees: int, tasks: int, seed: int = 0,
+                 child_ratio: float = 0.6, max_depth: int = 10,
+                 parent_window: int = 10000, assigned_ratio: float = 0.7,
+                 skew: float = 2.0, no_deadline_ratio: float = 0.1,
+                 start: datetime | None = None, days: int = 270):
+        self.employees = employees
+        self.tasks = tasks
+        self.seed = seed
+        self.child_ratio = child_ratio
+        self.max_depth = max_depth
+        self.parent_window = parent_window
+        self.assigned_ratio = assigned_ratio
+        self.skew = skew
+        self.no_deadline_ratio = no_deadline_ratio
+        self.start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.days = days
+
+    def employee_ids(self) -> list[uuid.UUID]:
+        """Детерминированные id сотрудников (зависят только от seed)."""
+        rng = random.Random(f'{self.seed}:employee_ids')
+        return [_random_uuid(rng) for _ in range(self.employees)]
+
+
+def _random_uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def generate_employees(spec: DatasetSpec) -> Iterator[dict]:
+    """
+    Потоковая генерация сотрудников.
+
+    Attributes:
+    -----------
+    spec : DatasetSpec  Параметры набора данных.
+
+    Returns:
+    --------
+    Iterator[dict]  Строки таблицы employee.
+    """
+    rng = random.Random(f'{spec.seed}:employees')
+    for i, employee_id in enumerate(spec.employee_ids()):
+        yield {
+            'id': employee_id,
+            'email': f'employee{spec.seed}-{i}@example.com',
+            'last_name': rng.choice(LAST_NAMES),
+            'first_name': rng.choice(FIRST_NAMES),
+            'patronymic': rng.choice(PATRONYMICS),
+            'post': rng.choice(POSTS),
+        }
+
+
+def generate_tasks(spec: DatasetSpec) -> Iterator[dict]:
+    """
+    Потоковая генерация задач.
+
+    Родительская задача выбирается среди последних parent_window задач,
+    поэтому деревья строятся при постоянном объеме памяти (в памяти
+    хранятся только id сотрудников). Сотрудники
+    выбираются по степенному распределению: небольшая группа получает
+    большую часть задач. Задачи с исполнителем имеют статус 1.
+
+    Attributes:
+    -----------
+    spec : DatasetSpec  Параметры набора данных.
+
+    Returns:
+    --------
+    Iterator[dict]  Строки таблицы task в порядке, допустимом для внешних ключей.
+    """
+    rng = random.Random(f'{spec.seed}:tasks')
+    employee_ids = spec.employee_ids()
+    # (id, глубина) последних задач - кандидаты в родительские
+    recent = deque(maxlen=spec.parent_window)
+    span = spec.days * 24 * 3600
+    for i in range(spec.tasks):
+        task_id = _random_uuid(rng)
+        parent_id = None
+        depth = 0
+        if recent and rng.random() < spec.child_ratio:
+            candidate_id, candidate_depth = recent[rng.randrange(len(recent))]
+            if candidate_depth < spec.max_depth - 1:
+                parent_id = candidate_id
+                depth = candidate_depth + 1
+        recent.append((task_id, depth))
+
+        employee_id = None
+        if employee_ids and rng.random() < spec.assigned_ratio:
+            employee_id = employee_ids[
+                int(len(employee_ids) * rng.random() ** spec.skew)]
+
+        period_of_execution = None
+        if rng.random() >= spec.no_deadline_ratio:
+            period_of_execution = spec.start + timedelta(
+                seconds=rng.randrange(span))
+
+        yield {
+            'id': task_id,
+            'name': f'Задание {spec.seed}-{i}',
+            'content': f'Описание задания {i}',
+            'period_of_execution': period_of_execution,
+            'parent_id': parent_id,
+            'status': 1 if employee_id else 0,
+            'employee_id': employee_id,
+        }
+
+
+class _CopyStream(io.RawIOBase):
+    """Файлоподобный объект, отдающий строки COPY из итератора по мере чтения."""
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        size = len(b)
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while available < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            encoded = line.encode()
+            parts.append(encoded)
+            available += len(encoded)
+        data = b''.join(parts)
+        size = min(size, len(data))
+        b[:size] = data[:size]
+        self._buffer = data[size:]
+        return size
+
+
+def _copy_value(value) -> str:
+    """Значение в текстовом формате COPY."""
+    if value is None:
+        return r'\N'
+    if isinstance(value, str):
+        if '\\' in value or '\t' in value or '\n' in value or '\r' in value:
+            return (value.replace('\\', '\\\\').replace('\t', '\\t').
+                    replace('\n', '\\n').replace('\r', '\\r'))
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _copy_rows(engine: Engine, table: str, columns: list[str],
+               rows: Iterator[dict]) -> None:
+    lines = ('\t'.join(_copy_value(row[c]) for c in columns) + '\n'
+             for row in rows)
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {table} ({", ".join(columns)}) FROM STDIN',
+                io.BufferedReader(_CopyStream(lines), 1 << 20))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _executemany_rows(engine: Engine, table: Table, column_names: list[str],
+                      rows: Iterator[dict], batch_size: int) -> None:
+    # Значения преобразуются процессорами типов колонок заранее, а пачки
+    # передаются напрямую в executemany драйвера
+    columns = [table.c[name] for name in column_names]
+    processors = [c.type.dialect_impl(engine.dialect).bind_processor(
+                      engine.dialect) or (lambda v: v)
+                  for c in columns]
+    values = ', '.join('?' if engine.dialect.paramstyle == 'qmark' else '%s'
+                       for _ in columns)
+    sql = (f'INSERT INTO {table.name} '
+           f'({", ".join(c.name for c in columns)}) VALUES ({values})')
+    with engine.begin() as conn:
+        batch = []
+        for row in rows:
+            batch.append(tuple(processor(row[c.name]) for processor, c
+                               in zip(processors, columns)))
+            if len(batch) >= batch_size:
+                conn.exec_driver_sql(sql, batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql(sql, batch)
+
+
+def load_dataset(engine: Engine, spec: DatasetSpec,
+                 batch_size: int = 10000) -> None:
+    """
+    Загрузка синтетического набора данных в БД.
+
+    В PostgreSQL данные передаются через COPY FROM STDIN, в остальных
+    СУБД - пачками executemany. Строки генерируются потоково, поэтому
+    объем памяти не зависит от размера набора.
+
+    Attributes:
+    -----------
+    engine : Engine     Синхронный движок целевой БД.
+    spec : DatasetSpec  Параметры набора данных.
+    batch_size : int    Размер пачки для executemany.
+    """
+    # Схема создается целиком, вместе с триггерами счетчиков задач
+    # и поисковым индексом, которые заполняются при загрузке
+    migrate(engine)
+    # Счетчик задач сотрудника заполняют триггеры при загрузке задач
+    employee_columns = [c.name for c in Employee.__table__.columns
+                        if c.name != 'active_task_count']
+    task_columns = [c.name for c in Task.__table__.columns]
+    if engine.dialect.name == 'postgresql':
+        _copy_rows(engine, 'employee', employee_columns,
+                   generate_employees(spec))
+        _copy_rows(engine, 'task', task_columns, generate_tasks(spec))
+    else:
+        _executemany_rows(engine, Employee.__table__, employee_columns,
+                          generate_employees(spec), batch_size)
+        _executemany_rows(engine, Task.__table__, task_columns,
+                          generate_tasks(spec), batch_size)
+    # Закэшированные клиентами списки (ETag) больше не актуальны
+    with engine.begin() as conn:
+        conn.execute(bump_statement('employee', 'task'))
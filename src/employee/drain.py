@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import logging
+import os
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import bindparam, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+
+from src.employee.model import (DrainJob, Employee, JOB_DONE, JOB_FAILED,
+                                JOB_RUNNING)
+from src.events import emit
+from src.tasks.model import Task, OPEN_STATUSES
+from src.tasks.services import invalidate_tasks
+from src.tasks.workload import WorkloadIndex, workload_index
+from src.versioning import bump_versions
+
+logger = logging.getLogger(__name__)
+
+# Размер пачки задач (одна транзакция) и пауза между пачками: задание
+# не держит блокировки и соединение дольше одной пачки и уступает
+# место запросам пользователей
+DRAIN_CHUNK_SIZE = int(os.getenv('DRAIN_CHUNK_SIZE', 500))
+DRAIN_PAUSE = float(os.getenv('DRAIN_PAUSE', 0.05))
+
+class NoEmployeesError(Exception):
+    """Нет сотрудников, которым можно передать задачи."""
+
+
+def open_tasks_filter(employee_id: UUID):
+    """Условие отбора незавершенных задач сотрудника."""
+    return (Task.employee_id == employee_id) & Task.status.in_(OPEN_STATUSES)
+
+
+async def drain_chunk(db: AsyncSession, job_id: UUID,
+                      employee_id: UUID) -> int | None:
+    """
+    Передача одной пачки задач сотрудника в отдельной транзакции.
+
+    Исполнители выбираются по правилам set_employee_important_task
+    (WorkloadIndex.choose_employee) по счетчикам, прочитанным в начале
+    пачки; сам сотрудник и другие сотрудники, задачи которых передаются,
+    в выборе не участвуют. Задачи, заблокированные
+    другими транзакциями, пропускаются (SKIP LOCKED) и передаются
+    следующими пачками. Каждая пачка продлевает аренду задания.
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    job_id : UUID       Идентификатор задания.
+    employee_id : UUID  Сотрудник, задачи которого передаются.
+
+    Returns:
+    --------
+    int | None  Количество переданных задач; None, если задач не осталось.
+    """
+    parent = aliased(Task)
+    result = await db.execute(
+        select(Task.id, parent.employee_id.label('parent_employee_id')).
+        outerjoin(parent, Task.parent_id == parent.id).
+        filter(open_tasks_filter(employee_id)).
+        order_by(Task.id).
+        limit(DRAIN_CHUNK_SIZE).
+        with_for_update(of=Task, skip_locked=True))
+    rows = result.all()
+    if not rows:
+        remaining = await db.scalar(
+            select(exists().where(open_tasks_filter(employee_id))))
+        if not remaining:
+            await db.rollback()
+            return None
+        # Все задачи заблокированы другими транзакциями: задание ждет
+        # их и продлевает аренду
+        await db.execute(
+            update(DrainJob).filter(DrainJob.id == job_id).
+            values(updated_at=datetime.now(timezone.utc)).
+            execution_options(synchronize_session=False))
+        await db.commit()
+        return 0
+
+    tally = WorkloadIndex()
+    await tally.warm_up(db)
+    tally.exclude_employee(employee_id)
+    assignments = []
+    for row in rows:
+        new_employee_id = tally.choose_employee(row.parent_employee_id)
+        if new_employee_id is None:
+            raise NoEmployeesError('Сотрудники для назначения не найдены')
+        tally.adjust(new_employee_id, 1)
+        assignments.append({'task_id': row.id,
+                            'new_employee_id': new_employee_id})
+
+    # Условие на текущего исполнителя не дает перезаписать задачу,
+    # переназначенную другим запросом
+    await db.execute(
+        update(Task.__table__).
+        where(Task.__table__.c.id == bindparam('task_id'),
+              Task.__table__.c.employee_id == employee_id).
+        values(employee_id=bindparam('new_employee_id')),
+        assignments)
+    await emit(db, 'task.assigned',
+               {assignment['task_id']: [employee_id,
+                                        assignment['new_employee_id']]
+                for assignment in assignments})
+    await db.execute(
+        update(DrainJob).filter(DrainJob.id == job_id).
+        values(moved=DrainJob.moved + len(assignments),
+               updated_at=datetime.now(timezone.utc)).
+        execution_options(synchronize_session=False))
+    await bump_versions(db, Task.__tablename__)
+    await db.commit()
+
+    invalidate_tasks([assignment['task_id'] for assignment in assignments],
+                     employee_ids={employee_id, *(
+                         assignment['new_employee_id']
+                         for assignment in assignments)})
+    # Сам сотрудник исключен из индекса на время задания
+    for assignment in assignments:
+        workload_index.adjust(assignment['new_employee_id'], 1)
+    return len(assignments)
+
+
+async def _set_status(db: AsyncSession, job_id: UUID, job_status: str,
+                      **values) -> None:
+    values['updated_at'] = datetime.now(timezone.utc)
+    if job_status in (JOB_DONE, JOB_FAILED):
+        values['finished_at'] = values['updated_at']
+    await db.execute(
+        update(DrainJob).filter(DrainJob.id == job_id).
+        values(status=job_status, **values).
+        execution_options(synchronize_session=False))
+    # Завершение задания возвращает сотрудника в списки загруженности
+    await bump_versions(db, Employee.__tablename__, Task.__tablename__)
+    await db.commit()
+
+
+async def _run_drain_job(session_factory: async_sessionmaker, job_id: UUID,
+                         employee_id: UUID) -> None:
+    async with session_factory() as db:
+        await _set_status(db, job_id, JOB_RUNNING)
+        workload_index.exclude_employee(employee_id)
+        try:
+            while (moved := await drain_chunk(db, job_id,
+                                              employee_id)) is not None:
+                # Пауза после полной пачки уступает место запросам
+                # пользователей, а после пустой - ждет задачи, заблокированные
+                # другими транзакциями; после неполной пачки задач не осталось
+                if moved in (0, DRAIN_CHUNK_SIZE):
+                    await asyncio.sleep(DRAIN_PAUSE)
+        except Exception as error:
+            await db.rollback()
+            logger.exception('Задание %s завершилось ошибкой', job_id)
+            await _set_status(db, job_id, JOB_FAILED, error=str(error))
+        else:
+            await _set_status(db, job_id, JOB_DONE)
+        finally:
+            # После завершения задания сотрудник снова участвует
+            # в распределении задач (со своим текущим счетчиком)
+            workload_index.reset()
+
+
+async def run_drain_job(session_factory: async_sessionmaker, job_id: UUID,
+                        employee_id: UUID) -> None:
+    """
+    Выполнение задания: передача задач сотрудника пачками до конца.
+
+    Запускается как фоновая задача после ответа клиенту, с собственной
+    сессией БД. Задание выполняется в новом контексте, чтобы его SQL
+    не попал в статистику HTTP-запроса, создавшего задание. Повторный
+    запуск безопасен: передаются только оставшиеся задачи.
+
+    Attributes:
+    -----------
+    session_factory : async_sessionmaker    Фабрика сессий базы данных.
+    job_id : UUID       Идентификатор задания.
+    employee_id : UUID  Сотрудник, задачи которого передаются.
+    """
+    await asyncio.get_running_loop().create_task(
+        _run_drain_job(session_factory, job_id, employee_id),
+        context=contextvars.Context())
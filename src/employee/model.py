@@ -1,6 +1,9 @@
+import os
 import uuid
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import Column, String
+from sqlalchemy import (Column, ColumnElement, Integer, String, Index,
+                        TIMESTAMP, exists)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, relationship
 
@@ -22,9 +25,16 @@ class Employee(Base):
     first_name : str    Имя сотрудника.
     patronymic : str (optional) Отчество сотрудника.
     post : str (optional)       Должность сотрудника.
+    active_task_count : int     Количество незавершенных задач сотрудника
+                                (поддерживается триггерами, см. src.tasks.counters).
     tasks : relationship[Task]  Отношение с моделью Task.
     """
     __tablename__ = 'employee'
+    __table_args__ = (
+        # Списки занятых и свободных сотрудников и выбор наименее
+        # загруженного читают счетчик, а не таблицу задач
+        Index('ix_employee_active_task_count_id', 'active_task_count', 'id'),
+    )
 
     id = Column(
         UUID(
@@ -37,10 +47,14 @@ class Employee(Base):
     first_name = Column(String, nullable=False)
     patronymic = Column(String)
     post = Column(String)
+    # server_default нужен, чтобы migrate мог добавить колонку
+    # в существующую таблицу
+    active_task_count = Column(Integer, nullable=False, default=0,
+                               server_default='0')
     tasks = relationship(
         'Task',
         back_populates='employees',
-        lazy='joined')
+        lazy='raise')
 
     def __repr__(self):
         """Метод возвращает строковое представление объекта Employee."""
@@ -55,4 +69,70 @@ class Employee(Base):
         Возвращает количество взятых для работы задач
         :return: количество задач
         """
-        return len(self.tasks)
+        return self.active_task_count
+
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+# Пока задание не завершено, сотрудник не получает новых задач
+ACTIVE_JOB_STATUSES = (JOB_PENDING, JOB_RUNNING)
+# Срок аренды задания в секундах: выполняющее задание продлевает ее
+# после каждой пачки. Задание с истекшей арендой считается прерванным
+# (воркер остановлен), и сотрудник снова участвует в распределении задач
+DRAIN_LEASE = float(os.getenv('DRAIN_LEASE', 60))
+
+
+class DrainJob(Base):
+    """
+    Задание на передачу незавершенных задач сотрудника другим сотрудникам.
+
+    Attributes:
+    -----------
+    id : UUID           Идентификатор задания.
+    employee_id : UUID  Сотрудник, задачи которого передаются.
+    status : str        pending, running, done или failed.
+    total : int         Количество незавершенных задач при создании задания.
+    moved : int         Количество переданных задач.
+    error : str         Причина ошибки (для failed).
+    created_at : datetime   Время создания.
+    updated_at : datetime   Время последнего продления аренды.
+    finished_at : datetime  Время завершения.
+    """
+    __tablename__ = 'drain_job'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Без внешнего ключа: после передачи задач сотрудника можно удалить,
+    # а история заданий останется
+    employee_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    status = Column(String, nullable=False, default=JOB_PENDING)
+    total = Column(Integer, nullable=False, default=0)
+    moved = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+
+
+def lease_expires_before() -> datetime:
+    """Время, раньше которого аренда задания считается истекшей."""
+    return datetime.now(timezone.utc) - timedelta(seconds=DRAIN_LEASE)
+
+
+def is_draining(employee_id) -> ColumnElement[bool]:
+    """
+    Условие: задачи сотрудника передаются другим (задание не завершено
+    и его аренда не истекла).
+
+    Attributes:
+    -----------
+    employee_id : UUID | Column Сотрудник или колонка с его ID.
+
+    Returns:
+    --------
+    ColumnElement[bool] Условие EXISTS по заданиям сотрудника.
+    """
+    return exists().where(DrainJob.employee_id == employee_id,
+                          DrainJob.status.in_(ACTIVE_JOB_STATUSES),
+                          DrainJob.updated_at > lease_expires_before())
@@ -49,3 +49,20 @@ class EmployeeCreateUpdateSchema(BaseEmployeeSchema):
 class EmployeeList(BaseModel):
     """Схема для представления списка сотрудников."""
     employees: List[EmployeeSchema]
+
+
+class EmployeeOffboardSchema(BaseModel):
+    """Схема для массового удаления (увольнения) сотрудников."""
+    employee_ids: List[UUID]
+
+
+class EmployeeWorkloadSchema(EmployeeSchema):
+    """Схема сотрудника с количеством назначенных ему задач."""
+    task_count: int
+
+
+class EmployeeWorkloadList(BaseModel):
+    """Схема для представления списка сотрудников с их загруженностью."""
+    status: str
+    results: int
+    employees: List[EmployeeWorkloadSchema]
@@ -1,81 +1,200 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Body
-from fastapi.openapi.models import Response
-from sqlalchemy.orm import Session, joinedload
-
-from src.db_connect import get_db
-from src.employee.model import Employee
-from src.employee.schema import EmployeeList, EmployeeCreateUpdateSchema
+import uuid
+from datetime import datetime, timezone
+from uuid import UUID
+
+from fastapi import (APIRouter, Depends, status, HTTPException, Body, Request,
+                     BackgroundTasks)
+from sqlalchemy import select, update, delete, exists, func, Select, Delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from src.bulk import iter_valid_chunks, insert_ignore_conflicts, ID_CHUNK_SIZE
+from src.cache import response_cache, task_key, employee_key, cached_response
+from src.db_connect import get_db, get_sessionmaker
+from src.employee.drain import open_tasks_filter, run_drain_job
+from src.employee.model import (ACTIVE_JOB_STATUSES, DrainJob, Employee,
+                                JOB_FAILED, is_draining, lease_expires_before)
+from src.employee.schema import (EmployeeList, EmployeeCreateUpdateSchema,
+                                 EmployeeWorkloadList, EmployeeOffboardSchema)
+from src.events import emit
+from src.export import export_response
+from src.pagination import paginate
+from src.serialization import ORJSONResponse, EMPLOYEE_DETAIL, to_json, dumps
+from src.tasks.model import Task
+from src.tasks.workload import workload_index
+from src.versioning import bump_versions, list_etag, etag_matches, not_modified
 
 api_employee = APIRouter(tags=['Сотрудники'], prefix='/employees')
 
+# Колонки сотрудника для списков и выгрузки. Счетчик задач меняется
+# вместе с задачами, а версия списка сотрудников (ETag) - нет, поэтому
+# он отдается только в списках загруженности
+EMPLOYEE_COLUMNS = tuple(column for column in Employee.__table__.c
+                         if column.name != 'active_task_count')
+
+
+def delete_free_employees(employee_ids) -> Delete:
+    """
+    Удаление сотрудников без назначенных задач одним запросом.
+
+    Условие на отсутствие задач проверяется в самом DELETE (NOT EXISTS),
+    поэтому задачи сотрудников не загружаются.
+
+    Attributes:
+    -----------
+    employee_ids : Iterable[UUID]   Идентификаторы сотрудников.
+
+    Returns:
+    --------
+    Delete  Запрос, возвращающий ID удаленных сотрудников.
+    """
+    return (delete(Employee).
+            filter(Employee.id.in_(employee_ids),
+                   ~exists().where(Task.employee_id == Employee.id)).
+            returning(Employee.id).
+            execution_options(synchronize_session=False))
+
 
-def count_tasks(s: Employee) -> int:
+def employees_workload_query(only_busy: bool = False) -> Select:
     """
-    Функция для подсчета количества задач у сотрудника.
+    Запрос списка сотрудников с количеством их незавершенных задач.
+
+    Количество читается из счетчика active_task_count, поэтому таблица
+    задач не сканируется, а сортировка идет по индексу счетчика.
+    Сотрудники, задачи которых передаются другим, в список не входят
+    до завершения задания.
 
     Attributes:
     -----------
-    s : Employee Объект сотрудника.
+    only_busy : bool    Оставить только сотрудников с задачами.
 
     Returns:
     --------
-    int Количество задач у сотрудника.
+    Select  Запрос, возвращающий колонки сотрудника и task_count.
+    """
+    query = (select(*EMPLOYEE_COLUMNS,
+                    Employee.active_task_count.label('task_count')).
+             filter(~is_draining(Employee.id)))
+    if only_busy:
+        query = query.filter(Employee.active_task_count > 0)
+    return query.order_by(Employee.active_task_count.desc(), Employee.id)
+
+
+async def workload_etag(db: AsyncSession, request: Request) -> str:
     """
-    return len(s.tasks)
+    ETag списков загруженности (employees_workload_query).
+
+    Кроме версий таблиц учитываются выполняющиеся задания передачи
+    задач: аренда задания истекает без записи в БД, а сотрудник при
+    этом возвращается в список.
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    request : Request   Запрос (учитываются путь и параметры).
+
+    Returns:
+    --------
+    str Слабый ETag.
+    """
+    result = await db.scalars(
+        select(DrainJob.id).
+        filter(DrainJob.status.in_(ACTIVE_JOB_STATUSES),
+               DrainJob.updated_at > lease_expires_before()).
+        order_by(DrainJob.id))
+    return await list_etag(db, request, Employee.__tablename__,
+                           Task.__tablename__,
+                           state=','.join(map(str, result.all())))
 
 
 @api_employee.get('/', response_model=EmployeeList)
-def get_employees(db: Session = Depends(get_db)) -> dict:
+async def get_employees(request: Request,
+                        db: AsyncSession = Depends(get_db)):
     """
     Получение списка всех сотрудников.
 
     Attributes:
     -----------
-    db : Session Сессия базы данных.
+    request : Request   Запрос (для проверки If-None-Match).
+    db : AsyncSession Сессия базы данных.
 
     Returns:
     --------
-    dict Словарь с информацией о сотрудниках.
+    ORJSONResponse Словарь с информацией о сотрудниках (304, если совпал ETag).
     """
-    employees = db.query(Employee).all()
-    print(employees)
-    return {'status': 'success',
-            'results': len(employees),
-            'employees': employees}
+    etag = await list_etag(db, request, Employee.__tablename__)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    result = await db.execute(select(*EMPLOYEE_COLUMNS))
+    return ORJSONResponse({'employees': result.all()},
+                          headers={'ETag': etag})
+
+
+@api_employee.get('/export')
+async def export_employees(
+        format: str = 'ndjson',
+        session_factory: async_sessionmaker = Depends(get_sessionmaker)):
+    """
+    Потоковая выгрузка всех сотрудников в NDJSON или CSV.
+
+    Attributes:
+    -----------
+    format : str    Формат выгрузки: ndjson или csv.
+    session_factory : async_sessionmaker    Фабрика сессий базы данных.
+
+    Returns:
+    --------
+    StreamingResponse   Потоковый ответ с сотрудниками.
+    """
+    return export_response(session_factory,
+                           select(*EMPLOYEE_COLUMNS).order_by(Employee.id),
+                           format, 'employees')
 
 
 @api_employee.get('/get/{employeeId}')
-def get_employee(employeeId: str, db: Session = Depends(get_db)):
+async def get_employee(employeeId: UUID, db: AsyncSession = Depends(get_db)):
     """
     Получение информации о конкретном сотруднике по ID.
 
     Attributes:
     -----------
-    employeeId : str    Идентификатор сотрудника.
-    db : Session    Сессия базы данных.
+    employeeId : UUID   Идентификатор сотрудника.
+    db : AsyncSession    Сессия базы данных.
 
     Returns:
     --------
-    dict    Словарь с информацией о сотруднике.
+    Response    Словарь с информацией о сотруднике (из кэша, если есть).
     """
-    employee = db.query(Employee).filter(
-        Employee.id == employeeId).first()  # Ищем сотрудника по ID
-    if not employee:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Сотрудник с id: {employeeId} не найден")
-    return {"status": "success", "employee": employee}
+    key = employee_key(employeeId)
+    body = response_cache.get(key)
+    if body is None:
+        version = response_cache.version()
+        result = await db.execute(
+            select(Employee).options(selectinload(Employee.tasks)).
+            filter(Employee.id == employeeId))  # Ищем сотрудника по ID
+        employee = result.unique().scalars().first()
+        if not employee:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Сотрудник с id: {employeeId} не найден")
+        body = dumps({"status": "success",
+                      "employee": to_json(EMPLOYEE_DETAIL, employee)})
+        # Карточка включает задачи сотрудника и сбрасывается при их изменении
+        response_cache.set(key, body,
+                           [task_key(task.id) for task in employee.tasks],
+                           version)
+    return cached_response(body)
 
 
 @api_employee.post('/create', status_code=status.HTTP_201_CREATED)
-def create_employees(payload: EmployeeCreateUpdateSchema = Body(),
-                     db: Session = Depends(get_db)):
+async def create_employees(payload: EmployeeCreateUpdateSchema = Body(),
+                           db: AsyncSession = Depends(get_db)):
     """
     Создание нового сотрудника на основе предоставленных данных.
 
     Attributes:
     -----------
     payload : EmployeeCreateUpdateSchema Данные для создания нового сотрудника.
-    db : Session Сессия базы данных.
+    db : AsyncSession Сессия базы данных.
 
     Returns:
     --------
@@ -83,115 +202,350 @@ def create_employees(payload: EmployeeCreateUpdateSchema = Body(),
     """
     new_employee = Employee(**payload.dict())
     db.add(new_employee)
-    db.commit()
-    db.refresh(new_employee)
-    return {'status': 'success', 'employee': new_employee}
+    await db.flush()
+    await emit(db, 'employee.created', {new_employee.id: [new_employee.id]})
+    await bump_versions(db, Employee.__tablename__)
+    await db.commit()
+    workload_index.add_employee(new_employee.id)
+    await db.refresh(new_employee, ['tasks'])
+    return ORJSONResponse({'status': 'success',
+                           'employee': to_json(EMPLOYEE_DETAIL, new_employee)},
+                          status_code=status.HTTP_201_CREATED)
+
+
+@api_employee.post('/bulk', status_code=status.HTTP_201_CREATED)
+async def create_employees_bulk(request: Request,
+                                db: AsyncSession = Depends(get_db)):
+    """
+    Массовое создание сотрудников из JSON-массива или NDJSON.
+
+    Каждая строка проверяется схемой EmployeeCreateUpdateSchema, строки
+    вставляются пачками многострочным INSERT ... RETURNING с фиксацией
+    каждой пачки. Строки с ошибками валидации или неуникальным email
+    пропускаются и возвращаются в errors.
+
+    Attributes:
+    -----------
+    request : Request   Запрос с массивом сотрудников в теле.
+    db : AsyncSession   Сессия базы данных.
+
+    Returns:
+    --------
+    dict    Количество созданных сотрудников и ошибки по строкам.
+    """
+    errors = []
+    created = 0
+    async for chunk in iter_valid_chunks(request, EmployeeCreateUpdateSchema,
+                                         errors):
+        rows = {}
+        for index, item in chunk:
+            row = item.dict()
+            row['id'] = uuid.uuid4()
+            rows[index] = row
+
+        inserted = await insert_ignore_conflicts(db, Employee,
+                                                 list(rows.values()))
+        await emit(db, 'employee.created',
+                   {employee_id: [employee_id] for employee_id in inserted})
+        await bump_versions(db, Employee.__tablename__)
+        await db.commit()
+        created += len(inserted)
+        for index, row in rows.items():
+            if row['id'] in inserted:
+                workload_index.add_employee(row['id'])
+            else:
+                errors.append({'index': index,
+                               'detail': f"Сотрудник с email {row['email']} уже существует"})
+
+    errors.sort(key=lambda error: error['index'])
+    return {'status': 'success', 'results': created, 'errors': errors}
 
 
 @api_employee.patch('/update/{employeeId}')
-def update_employee(employeeId: str,
-                    payload: EmployeeCreateUpdateSchema = Depends(),
-                    db: Session = Depends(get_db)):
+async def update_employee(employeeId: UUID,
+                          payload: EmployeeCreateUpdateSchema = Depends(),
+                          with_relations: bool = True,
+                          db: AsyncSession = Depends(get_db)):
     """
     Обновление информации о сотруднике по его ID.
 
+    Сотрудник обновляется одним UPDATE ... RETURNING; задачи сотрудника
+    загружаются отдельным запросом, только если они нужны в ответе.
+
     Attributes:
     -----------
-    employeeId : str    Идентификатор сотрудника.
+    employeeId : UUID   Идентификатор сотрудника.
     payload : EmployeeCreateUpdateSchema    Данные для обновления информации о сотруднике.
-    db : Session    Сессия базы данных.
+    with_relations : bool   Вернуть сотрудника вместе с его задачами.
+    db : AsyncSession    Сессия базы данных.
     """
-    employee_query = db.query(Employee).filter(Employee.id == employeeId)
-    db_employee = employee_query.first()
+    update_data = payload.dict(exclude_unset=True)
+    result = await db.execute(
+        update(Employee).filter(Employee.id == employeeId).
+        values(update_data).returning(*Employee.__table__.c).
+        execution_options(synchronize_session=False))
+    employee = result.first()
 
-    if not db_employee:
+    if employee is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f'Сотрудник с id: {employeeId} не найден')
-    update_data = payload.dict(exclude_unset=True)
-    employee_query.filter(Employee.id == employeeId).update(
-        update_data, synchronize_session=False)
-    db.commit()
-    db.refresh(db_employee)
-    return {"status": "success", "employee": db_employee}
+    await emit(db, 'employee.updated', {employeeId: [employeeId]})
+    await bump_versions(db, Employee.__tablename__)
+    await db.commit()
+    response_cache.invalidate(employee_key(employeeId))
+    if not with_relations:
+        return ORJSONResponse({"status": "success", "employee": employee})
+
+    result = await db.execute(
+        select(Employee).options(selectinload(Employee.tasks)).
+        filter(Employee.id == employeeId).
+        execution_options(populate_existing=True))
+    return ORJSONResponse(
+        {"status": "success",
+         "employee": to_json(EMPLOYEE_DETAIL, result.scalars().first())})
 
 
 @api_employee.delete('/del/{employeeId}')
-def delete_employee(employeeId: str, db: Session = Depends(get_db)):
+async def delete_employee(employeeId: UUID,
+                          db: AsyncSession = Depends(get_db)):
     """
     Удаление сотрудника по его ID.
 
     Attributes:
     -----------
-    employeeId: str    Идентификатор сотрудника.
-    db: Session    Сессия базы данных.
+    employeeId: UUID    Идентификатор сотрудника.
+    db: AsyncSession    Сессия базы данных.
 
     Returns:
     --------
     dict    Результат удаления сотрудника.
     """
-    employee = db.query(Employee).filter(Employee.id == employeeId).first()
-    if not employee:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f'Сотрудник с id: {employeeId} не найден')
-
-    if employee.tasks:
+    result = await db.execute(delete_free_employees([employeeId]))
+    if result.first() is None:
+        # Ничего не удалено: сотрудника нет или у него есть задачи
+        found = await db.scalar(
+            select(exists().where(Employee.id == employeeId)))
+        if not found:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f'Сотрудник с id: {employeeId} не найден')
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=f"У сотрудника с id: {employeeId} есть назначенные задачи. Удаление невозможно!")
 
-    db.query(Employee).filter(Employee.id == employeeId).delete()
-    db.commit()
+    await emit(db, 'employee.deleted', {employeeId: [employeeId]})
+    await bump_versions(db, Employee.__tablename__)
+    await db.commit()
+    response_cache.invalidate(employee_key(employeeId))
+    workload_index.remove_employee(employeeId)
 
     return {"status": "success", "message": "Сотрудник успешно удален."}
 
 
-@api_employee.get('/busy', response_model=EmployeeList)
-def get_employees_busy(db: Session = Depends(get_db)) -> dict:
+@api_employee.post('/offboard')
+async def offboard_employees(payload: EmployeeOffboardSchema = Body(),
+                             db: AsyncSession = Depends(get_db)):
     """
-    Получение списка занятых сотрудников, с сортировкой по количеству задач.
+    Массовое удаление сотрудников в одной транзакции.
+
+    Удаляются сотрудники без назначенных задач (пачками по ID_CHUNK_SIZE
+    условным DELETE), для остальных одним запросом определяется, найден
+    ли сотрудник.
 
     Attributes:
     -----------
-    db : Session Сессия базы данных.
+    payload : EmployeeOffboardSchema    Идентификаторы сотрудников.
+    db : AsyncSession   Сессия базы данных.
 
     Returns:
     --------
-    dict Словарь со списком занятых сотрудников, отсортированных по количеству задач.
+    dict    Удаленные сотрудники, ненайденные и сотрудники с задачами.
     """
-    employees_query = (db.query(Employee).options(joinedload(Employee.tasks)).
-                       filter(Employee.tasks is not None).all())
-    employees = []
-    for employee in employees_query:
-        if len(employee.tasks) != 0:
-            employees.append(employee)
-    employees = sorted(employees, key=count_tasks, reverse=True)
+    employee_ids = list(dict.fromkeys(payload.employee_ids))
+    deleted = set()
+    for i in range(0, len(employee_ids), ID_CHUNK_SIZE):
+        result = await db.execute(
+            delete_free_employees(employee_ids[i:i + ID_CHUNK_SIZE]))
+        deleted.update(result.scalars().all())
+
+    remaining = [employee_id for employee_id in employee_ids
+                 if employee_id not in deleted]
+    found = set()
+    for i in range(0, len(remaining), ID_CHUNK_SIZE):
+        result = await db.execute(
+            select(Employee.id).
+            filter(Employee.id.in_(remaining[i:i + ID_CHUNK_SIZE])))
+        found.update(result.scalars().all())
+
+    if deleted:
+        await emit(db, 'employee.deleted',
+                   {employee_id: [employee_id] for employee_id in deleted})
+        await bump_versions(db, Employee.__tablename__)
+    await db.commit()
+    if deleted:
+        response_cache.invalidate(*(employee_key(employee_id)
+                                    for employee_id in deleted))
+        for employee_id in deleted:
+            workload_index.remove_employee(employee_id)
 
     return {'status': 'success',
-            'results': len(employees),
-            'employees': employees}
+            'results': len(deleted),
+            'deleted': [employee_id for employee_id in employee_ids
+                        if employee_id in deleted],
+            'has_tasks': [employee_id for employee_id in remaining
+                          if employee_id in found],
+            'not_found': [employee_id for employee_id in remaining
+                          if employee_id not in found]}
+
+
+async def get_drain_job_row(db: AsyncSession, job_id: UUID):
+    """Колонки задания передачи задач или None, если его нет."""
+    result = await db.execute(
+        select(*DrainJob.__table__.c).filter(DrainJob.id == job_id))
+    return result.mappings().first()
+
+
+@api_employee.post('/{employeeId}/drain',
+                   status_code=status.HTTP_202_ACCEPTED)
+async def drain_employee(
+        employeeId: UUID,
+        background_tasks: BackgroundTasks,
+        db: AsyncSession = Depends(get_db),
+        session_factory: async_sessionmaker = Depends(get_sessionmaker)):
+    """
+    Запуск фонового задания, передающего все незавершенные задачи
+    сотрудника наименее загруженным коллегам (например, перед увольнением).
+
+    Задачи передаются пачками по DRAIN_CHUNK_SIZE в отдельных транзакциях
+    по правилам выбора исполнителя set_employee_important_task; ход
+    выполнения возвращает GET /employees/drain/{jobId}. Пока у сотрудника
+    есть выполняющееся задание, новое не создается (409); задания,
+    аренда которых истекла (DRAIN_LEASE), отмечаются как failed.
+
+    Attributes:
+    -----------
+    employeeId : UUID   Идентификатор сотрудника.
+    background_tasks : BackgroundTasks  Фоновые задачи запроса.
+    db : AsyncSession   Сессия базы данных.
+    session_factory : async_sessionmaker    Фабрика сессий для задания.
+
+    Returns:
+    --------
+    ORJSONResponse  Созданное задание (202).
+    """
+    found = await db.scalar(select(exists().where(Employee.id == employeeId)))
+    if not found:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f'Сотрудник с id: {employeeId} не найден')
+    # Задания, аренда которых истекла, прерваны остановкой воркера
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        update(DrainJob).
+        filter(DrainJob.employee_id == employeeId,
+               DrainJob.status.in_(ACTIVE_JOB_STATUSES),
+               ~is_draining(employeeId)).
+        values(status=JOB_FAILED, error='Задание прервано', updated_at=now,
+               finished_at=now).
+        execution_options(synchronize_session=False))
+    if await db.scalar(select(is_draining(employeeId))):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f'Задачи сотрудника с id: {employeeId} '
+                                   f'уже передаются')
+    total = await db.scalar(
+        select(func.count()).select_from(Task).
+        filter(open_tasks_filter(employeeId)))
+    job = DrainJob(id=uuid.uuid4(), employee_id=employeeId, total=total,
+                   created_at=now, updated_at=now)
+    db.add(job)
+    # Сотрудник выходит из списков загруженности (ETag)
+    await bump_versions(db, Employee.__tablename__, Task.__tablename__)
+    await db.commit()
+    workload_index.exclude_employee(employeeId)
+    background_tasks.add_task(run_drain_job, session_factory, job.id,
+                              employeeId)
+    return ORJSONResponse({'status': 'success',
+                           'job': await get_drain_job_row(db, job.id)},
+                          status_code=status.HTTP_202_ACCEPTED)
+
+
+@api_employee.get('/drain/{jobId}')
+async def get_drain_job(jobId: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Состояние задания передачи задач сотрудника.
+
+    Attributes:
+    -----------
+    jobId : UUID    Идентификатор задания.
+    db : AsyncSession   Сессия базы данных.
+
+    Returns:
+    --------
+    ORJSONResponse  Статус задания, количество задач и переданных задач.
+    """
+    job = await get_drain_job_row(db, jobId)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f'Задание с id: {jobId} не найдено')
+    return ORJSONResponse({'status': 'success', 'job': job})
+
+
+@api_employee.get('/busy', response_model=EmployeeWorkloadList)
+async def get_employees_busy(request: Request,
+                             db: AsyncSession = Depends(get_db),
+                             limit: int | None = None,
+                             page: int = 1):
+    """
+    Получение списка занятых сотрудников, с сортировкой по количеству задач.
+
+    Attributes:
+    -----------
+    request : Request   Запрос (для проверки If-None-Match).
+    db : AsyncSession Сессия базы данных.
+    limit : int | None  Количество сотрудников на страницу.
+    page : int  Номер страницы.
+
+    Returns:
+    --------
+    ORJSONResponse Словарь со списком занятых сотрудников, отсортированных
+                   по количеству задач (304, если совпал ETag).
+    """
+    etag = await workload_etag(db, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    query = employees_workload_query(only_busy=True)
+    result = await db.execute(paginate(query, limit, page))
+    employees = result.mappings().all()
+
+    return ORJSONResponse({'status': 'success',
+                           'results': len(employees),
+                           'employees': employees},
+                          headers={'ETag': etag})
 
 
 @api_employee.get('/free')
-def get_employees_free(db: Session = Depends(get_db)):
+async def get_employees_free(db: AsyncSession = Depends(get_db),
+                             limit: int | None = None, page: int = 1):
     """
     Получение списка свободных сотрудников.
 
     Attributes:
     -----------
-    db : Session Сессия базы данных.
+    db : AsyncSession Сессия базы данных.
+    limit : int | None  Количество сотрудников на страницу.
+    page : int  Номер страницы.
 
     Returns:
     --------
     dict Словарь со свободными сотрудниками.
     """
-
-    employees_query = db.query(Employee).all()
-    employees = []
-    for employee in employees_query:
-        if len(employee.tasks) == 0:
-            employees.append(employee)
+    query = (select(*EMPLOYEE_COLUMNS).
+             filter(Employee.active_task_count == 0,
+                    ~is_draining(Employee.id)).
+             order_by(Employee.id))
+    result = await db.execute(paginate(query, limit, page))
+    employees = result.mappings().all()
 
     if len(employees) == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='Сотрудников без заданий не найдено')
 
-    return {"status": "success", "employees": employees}
+    return ORJSONResponse({"status": "success", "results": len(employees),
+                           "employees": employees})
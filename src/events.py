@@ -0,0 +1,457 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from typing import AsyncIterator, Iterable
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, Header, Query, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from sqlalchemy import DDL, Text, bindparam, event, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketDisconnect
+
+from src.employee.model import Base
+from src.metrics import collectors
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних событий хранится для продолжения потока
+# (Last-Event-ID) и как часто отправляется пустое сообщение, чтобы
+# прокси не закрывали простаивающие соединения
+EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', 1024))
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', 15))
+# Канал LISTEN/NOTIFY и последовательность номеров событий (PostgreSQL)
+EVENTS_CHANNEL = 'task_tracker_events'
+EVENTS_SEQUENCE = 'event_id_seq'
+# Сколько ID сущностей помещается в одно событие: полезная нагрузка
+# NOTIFY ограничена 8000 байт
+EVENT_MAX_IDS = 50
+# Событие для клиента, который пропустил часть событий: данные нужно
+# перечитать целиком
+RESET_EVENT = 'reset'
+
+_PG_DDL = [f'CREATE SEQUENCE IF NOT EXISTS {EVENTS_SEQUENCE}']
+
+
+def events_ddl(dialect_name: str) -> list[str]:
+    """DDL, необходимый ленте событий в диалекте (только PostgreSQL)."""
+    return _PG_DDL if dialect_name == 'postgresql' else []
+
+
+for _statement in _PG_DDL:
+    event.listen(Base.metadata, 'after_create',
+                 DDL(_statement).execute_if(dialect='postgresql'))
+
+
+def _chunks(changes: dict, size: int = EVENT_MAX_IDS):
+    items = list(changes.items())
+    for i in range(0, len(items), size):
+        chunk = items[i:i + size]
+        yield ([str(entity_id) for entity_id, _ in chunk],
+               sorted({str(employee_id) for _, employee_ids in chunk
+                       for employee_id in employee_ids
+                       if employee_id is not None}))
+
+
+class EventBroker:
+    """
+    Брокер событий об изменении задач и сотрудников в памяти процесса.
+
+    Последние события хранятся в кольцевом буфере, подписчики не имеют
+    собственных очередей: ожидающий подписчик - это одна отложенная
+    Future, которую будит публикация, после чего он читает новые события
+    из общего буфера. Поэтому простаивающие подписчики почти ничего
+    не стоят. В PostgreSQL буфер каждого воркера наполняет
+    PostgresEventListener, и номера событий у всех воркеров совпадают.
+
+    Attributes:
+    -----------
+    buffer_size : int   Количество хранимых событий.
+    """
+
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.published = 0
+        self.subscribers = 0
+        self._events: deque[dict] = deque(maxlen=buffer_size)
+        self._truncated = False
+        self._last_id = 0
+        # Номер, после которого брокер видел все события: воркер,
+        # подключившийся к ленте позже других, не знает более ранних
+        self._start_id: int | None = None
+        self._waiters: set[asyncio.Future] = set()
+        # Публикация может идти из другого потока (и цикла событий),
+        # чем ожидание подписчика
+        self._lock = threading.Lock()
+
+    def last_event_id(self) -> int:
+        """Номер последнего события в буфере (0, если их не было)."""
+        with self._lock:
+            return self._events[-1]['id'] if self._events else self._last_id
+
+    def publish(self, event_type: str, ids: list[str],
+                employee_ids: list[str], event_id: int | None = None) -> dict:
+        """
+        Добавление события в буфер и пробуждение подписчиков.
+
+        Attributes:
+        -----------
+        event_type : str    Тип события, например task.updated.
+        ids : list[str]     ID измененных сущностей.
+        employee_ids : list[str]    ID затронутых сотрудников.
+        event_id : int | None   Номер события (по умолчанию - следующий).
+
+        Returns:
+        --------
+        dict    Опубликованное событие.
+        """
+        with self._lock:
+            if event_id is None:
+                event_id = self._last_id + 1
+            self._last_id = max(self._last_id, event_id)
+            if self._start_id is None:
+                self._start_id = event_id - 1
+            item = {'id': event_id, 'type': event_type, 'ids': ids,
+                    'employee_ids': employee_ids}
+            self._truncated |= len(self._events) == self.buffer_size
+            self._events.append(item)
+            self.published += 1
+            waiters, self._waiters = self._waiters, set()
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+        return item
+
+    def since(self, last_event_id: int | None) -> list[dict] | None:
+        """
+        События после события last_event_id в порядке публикации.
+
+        Attributes:
+        -----------
+        last_event_id : int | None  Номер последнего полученного события;
+                                    None - все события брокера.
+
+        Returns:
+        --------
+        list[dict] | None   None, если события last_event_id уже нет
+                            в буфере или оно старше первого события,
+                            увиденного брокером, и часть событий могла
+                            быть потеряна.
+        """
+        with self._lock:
+            if last_event_id is None:
+                return None if self._truncated else list(self._events)
+            found = []
+            for item in reversed(self._events):
+                if item['id'] == last_event_id:
+                    found.reverse()
+                    return found
+                found.append(item)
+            if self._start_id is None:
+                return found
+            if (not self._truncated and last_event_id >= self._start_id and
+                    all(item['id'] > last_event_id for item in found)):
+                found.reverse()
+                return found
+            return None
+
+    async def wait(self, last_event_id: int | None, timeout: float) -> None:
+        """
+        Ожидание публикации после события last_event_id, но не дольше
+        timeout секунд.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            # Событие могло быть опубликовано после проверки буфера
+            # подписчиком, тогда ждать нечего
+            if self._events and self._events[-1]['id'] != last_event_id:
+                return
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    async def subscribe(self, last_event_id: int | None = None,
+                        employee_id: UUID | None = None,
+                        heartbeat: float = EVENTS_HEARTBEAT
+                        ) -> AsyncIterator[dict | None]:
+        """
+        Поток событий для подписчика.
+
+        Attributes:
+        -----------
+        last_event_id : int | None  Номер последнего полученного события;
+                                    None - только новые события.
+        employee_id : UUID | None   Только события, затрагивающие сотрудника.
+        heartbeat : float   Через сколько секунд без событий выдается None.
+
+        Returns:
+        --------
+        AsyncIterator[dict | None]  События; None - событий не было
+                                    heartbeat секунд.
+        """
+        employee = str(employee_id) if employee_id is not None else None
+        if last_event_id is None and self.published:
+            # Пока событий не было, поток идет с первого события брокера
+            last_event_id = self.last_event_id()
+        self.subscribers += 1
+        try:
+            while True:
+                events = self.since(last_event_id)
+                if events is None:
+                    # Продолжить поток без пропусков нельзя: клиент должен
+                    # перечитать данные, поток идет с текущего события
+                    last_event_id = self.last_event_id()
+                    yield {'id': last_event_id, 'type': RESET_EVENT,
+                           'ids': [], 'employee_ids': []}
+                    continue
+                if not events:
+                    await self.wait(last_event_id, heartbeat)
+                    if not self.since(last_event_id):
+                        yield None
+                    continue
+                for item in events:
+                    last_event_id = item['id']
+                    if (employee is None or item['type'] == RESET_EVENT or
+                            employee in item['employee_ids']):
+                        yield item
+        finally:
+            self.subscribers -= 1
+
+    def reset(self) -> None:
+        """Сообщение подписчикам, что события могли быть пропущены."""
+        self.publish(RESET_EVENT, [], [])
+
+    def collect(self) -> Iterable[str]:
+        """Счетчики брокера в текстовом формате Prometheus."""
+        yield '# HELP events_published Опубликованные события изменений'
+        yield '# TYPE events_published counter'
+        yield f'events_published_total {self.published}'
+        yield '# HELP events_subscribers Подписчики ленты событий'
+        yield '# TYPE events_subscribers gauge'
+        yield f'events_subscribers {self.subscribers}'
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+event_broker = EventBroker()
+collectors.append(event_broker.collect)
+
+
+async def emit(db: AsyncSession, event_type: str,
+               changes: dict[UUID, Iterable[UUID | None]]) -> None:
+    """
+    Регистрация события в текущей транзакции (вызывается до commit).
+
+    В PostgreSQL событие отправляется через NOTIFY, который доставляется
+    всем воркерам только после фиксации транзакции. В остальных СУБД
+    событие публикуется брокером процесса после commit сессии.
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    event_type : str    Тип события, например task.updated.
+    changes : dict      ID измененной сущности -> ID затронутых сотрудников.
+    """
+    chunks = list(_chunks(changes))
+    if not chunks:
+        return
+    if db.get_bind().dialect.name == 'postgresql':
+        payloads = [orjson.dumps({'type': event_type, 'ids': ids,
+                                  'employee_ids': employee_ids}).decode()
+                    for ids, employee_ids in chunks]
+        await db.execute(
+            text(f"SELECT pg_notify(:channel, "
+                 f"nextval('{EVENTS_SEQUENCE}')::text || ' ' || payload) "
+                 f"FROM unnest(CAST(:payloads AS text[])) AS payload").
+            bindparams(bindparam('payloads', type_=ARRAY(Text))),
+            {'channel': EVENTS_CHANNEL, 'payloads': payloads})
+        return
+    pending = db.sync_session.info.setdefault('pending_events', [])
+    pending.extend((event_type, ids, employee_ids)
+                   for ids, employee_ids in chunks)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session, **kw):
+    for event_type, ids, employee_ids in session.info.pop('pending_events',
+                                                          ()):
+        event_broker.publish(event_type, ids, employee_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session, **kw):
+    session.info.pop('pending_events', None)
+
+
+class PostgresEventListener:
+    """
+    Подписка воркера на события всех воркеров через LISTEN (PostgreSQL).
+
+    Держит отдельное соединение asyncpg вне пула и переподключается
+    при его потере; после переподключения подписчики получают событие
+    reset, так как часть событий могла быть пропущена.
+
+    Attributes:
+    -----------
+    url : str   SQLAlchemy URL подключения через asyncpg.
+    broker : EventBroker    Брокер, в который публикуются события.
+    """
+
+    def __init__(self, url: str, broker: EventBroker = event_broker,
+                 retry_interval: float = 5.0):
+        self.url = make_url(url).set(drivername='postgresql').render_as_string(
+            hide_password=False)
+        self.broker = broker
+        self.retry_interval = retry_interval
+        self._task: asyncio.Task | None = None
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        event_id, _, data = payload.partition(' ')
+        try:
+            item = orjson.loads(data)
+            self.broker.publish(item['type'], item['ids'],
+                                item['employee_ids'], int(event_id))
+        except (ValueError, KeyError):
+            logger.warning('Некорректное событие: %s', payload)
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        reconnected = False
+        while True:
+            try:
+                connection = await asyncpg.connect(self.url)
+            except (OSError, asyncpg.PostgresError):
+                logger.exception('Нет соединения для ленты событий')
+                await asyncio.sleep(self.retry_interval)
+                continue
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(EVENTS_CHANNEL, self._on_notify)
+                if reconnected:
+                    self.broker.reset()
+                reconnected = True
+                await lost.wait()
+                logger.warning('Соединение ленты событий потеряно')
+            finally:
+                await connection.close()
+
+    def start(self) -> None:
+        """Запуск подписки в фоне (в цикле событий приложения)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Остановка подписки."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+api_events = APIRouter(tags=['События'], prefix='/events')
+
+
+def _format_sse(item: dict | None) -> bytes:
+    if item is None:
+        return b': keep-alive\n\n'
+    return (f"id: {item['id']}\nevent: {item['type']}\ndata: ".encode() +
+            orjson.dumps(item) + b'\n\n')
+
+
+async def sse_stream(last_event_id: int | None,
+                     employee_id: UUID | None) -> AsyncIterator[bytes]:
+    """Поток событий в формате Server-Sent Events."""
+    async for item in event_broker.subscribe(last_event_id, employee_id):
+        yield _format_sse(item)
+
+
+@api_events.get('')
+async def stream_events(request: Request,
+                        employee_id: UUID | None = None,
+                        last_event_id: int | None = Query(None),
+                        last_event_id_header: int | None = Header(
+                            None, alias='Last-Event-ID')):
+    """
+    Лента изменений задач и сотрудников (Server-Sent Events).
+
+    События: task.created, task.updated, task.assigned, task.deleted,
+    employee.created, employee.updated, employee.deleted и reset
+    (часть событий пропущена, данные нужно перечитать). Событие содержит
+    ID измененных сущностей и затронутых сотрудников, сами данные
+    читаются обычными роутами.
+
+    Attributes:
+    -----------
+    request : Request   Запрос.
+    employee_id : UUID | None   Только события, затрагивающие сотрудника.
+    last_event_id : int | None  Продолжить поток после этого события.
+    last_event_id_header : int | None   То же из заголовка Last-Event-ID,
+                                        который браузер передает при
+                                        переподключении.
+
+    Returns:
+    --------
+    StreamingResponse   Бесконечный поток text/event-stream.
+    """
+    if last_event_id is None:
+        last_event_id = last_event_id_header
+    return StreamingResponse(
+        sse_stream(last_event_id, employee_id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@api_events.websocket('/ws')
+async def websocket_events(websocket: WebSocket,
+                           employee_id: UUID | None = None,
+                           last_event_id: int | None = None):
+    """
+    Лента изменений задач и сотрудников через WebSocket.
+
+    События те же, что и в /events, каждое - отдельное JSON-сообщение;
+    при отсутствии событий раз в EVENTS_HEARTBEAT секунд отправляется
+    {"type": "ping"}.
+    """
+    await websocket.accept()
+
+    async def send_events():
+        async for item in event_broker.subscribe(last_event_id, employee_id):
+            await websocket.send_text(
+                orjson.dumps(item or {'type': 'ping'}).decode())
+
+    async def wait_disconnect():
+        # Сообщения клиента не нужны, но без чтения отключение клиента
+        # было бы замечено только при следующей отправке
+        while (await websocket.receive())['type'] != 'websocket.disconnect':
+            pass
+
+    tasks = {asyncio.create_task(send_events()),
+             asyncio.create_task(wait_disconnect())}
+    try:
+        done, _ = await asyncio.wait(tasks,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# Количество строк, читаемых из серверного курсора за один раз
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _json_default(value):
+    if isinstance(value, (UUID, datetime)):
+        return str(value)
+    raise TypeError(f'Тип {type(value)} не сериализуется в JSON')
+
+
+def _encode_batch(rows, columns: list[str], export_format: str) -> str:
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+    return ''.join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False,
+                   default=_json_default) + '\n'
+        for row in rows)
+
+
+async def _stream_rows(session_factory: async_sessionmaker, query: Select,
+                       export_format: str) -> AsyncIterator[str]:
+    columns = [column.name for column in query.selected_columns]
+    # Сессия открывается в самом генераторе: зависимость get_db
+    # закрывается до того, как StreamingResponse начнет отдавать тело
+    async with session_factory() as db:
+        result = await db.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == 'csv':
+            yield _encode_batch([columns], columns, export_format)
+        async for rows in result.partitions():
+            yield _encode_batch(rows, columns, export_format)
+
+
+def export_response(session_factory: async_sessionmaker, query: Select,
+                    export_format: str, filename: str) -> StreamingResponse:
+    """
+    Потоковая выгрузка результата запроса в NDJSON или CSV.
+
+    Строки читаются серверным курсором пачками по EXPORT_BATCH_SIZE и сразу
+    отправляются клиенту, поэтому память не зависит от размера выгрузки.
+
+    Attributes:
+    -----------
+    session_factory : async_sessionmaker    Фабрика сессий базы данных.
+    query : Select  Запрос, выбирающий колонки (не ORM-объекты).
+    export_format : str Формат выгрузки: ndjson или csv.
+    filename : str  Имя файла без расширения для Content-Disposition.
+
+    Returns:
+    --------
+    StreamingResponse   Потоковый ответ.
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f'Неизвестный формат выгрузки: {export_format}')
+    return StreamingResponse(
+        _stream_rows(session_factory, query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={'Content-Disposition':
+                 f'attachment; filename="{filename}.{export_format}"'})
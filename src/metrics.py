@@ -0,0 +1,415 @@
+import logging
+import os
+import secrets
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз одинаковый SELECT может выполниться за один запрос,
+# прежде чем запрос будет отмечен как N+1
+SQL_REPEAT_THRESHOLD = int(os.getenv('SQL_REPEAT_THRESHOLD', 5))
+
+# Токен служебных роутов (состояние пула соединений). Без токена
+# роуты не публикуются: запрос к ним получает 404
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000, 10000)
+
+
+class RequestStats:
+    """
+    Статистика работы с БД в рамках одного HTTP-запроса.
+
+    Attributes:
+    -----------
+    statements : int    Количество выполненных SQL-запросов.
+    db_time : float     Суммарное время выполнения SQL-запросов, с.
+    rows : int          Количество полученных или измененных строк.
+    pool_wait : float   Время ожидания соединения из пула, с.
+    repeated : Counter  Количество выполнений каждого SELECT.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.pool_wait = 0.0
+        self.repeated = Counter()
+
+    def max_repeats(self) -> int:
+        """Наибольшее количество выполнений одного и того же SELECT."""
+        return max(self.repeated.values(), default=0)
+
+
+_current_stats: ContextVar[RequestStats | None] = ContextVar(
+    'request_sql_stats', default=None)
+
+
+def current_stats() -> RequestStats | None:
+    """Статистика текущего HTTP-запроса (None вне запроса)."""
+    return _current_stats.get()
+
+
+def _fetched_rows(cursor) -> int:
+    if cursor.rowcount is not None and cursor.rowcount >= 0:
+        return cursor.rowcount
+    # Асинхронные адаптеры SQLAlchemy заранее читают строки SELECT в буфер
+    return len(getattr(cursor, '_rows', None) or ())
+
+
+# Время начала запроса хранится в контексте выполнения, а не в соединении:
+# если запрос завершился ошибкой, after_cursor_execute не вызывается,
+# и значение не должно остаться на соединении, вернувшемся в пул
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = getattr(context, '_query_started', None)
+    stats.statements += 1
+    if started is not None:
+        stats.db_time += time.perf_counter() - started
+    stats.rows += _fetched_rows(cursor)
+    if statement.lstrip()[:6].upper() == 'SELECT':
+        stats.repeated[statement] += 1
+
+
+def _do_orm_execute(orm_execute_state):
+    session = orm_execute_state.session
+    if not session.in_transaction():
+        session.info['connection_requested'] = time.perf_counter()
+
+
+class PoolWaitStats:
+    """
+    Накопленное время ожидания соединения из пула одного движка.
+
+    Attributes:
+    -----------
+    count : int     Количество полученных соединений.
+    total : float   Суммарное время ожидания, с.
+    max : float     Наибольшее время ожидания, с.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, wait: float) -> None:
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+
+# Движки, подписанные через instrument_engine, и ожидание их пулов
+_engines: dict[Engine, PoolWaitStats] = {}
+
+
+def _after_begin(session, transaction, connection):
+    requested = session.info.pop('connection_requested', None)
+    if requested is None:
+        return
+    wait = time.perf_counter() - requested
+    pool_wait = _engines.get(connection.engine)
+    if pool_wait is not None:
+        pool_wait.observe(wait)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.pool_wait += wait
+
+
+def instrument_engine(engine: Engine | AsyncEngine) -> None:
+    """
+    Подписка на события движка для сбора статистики SQL по запросам.
+
+    Attributes:
+    -----------
+    engine : Engine | AsyncEngine   Движок базы данных.
+    """
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    _engines.setdefault(engine, PoolWaitStats())
+    if not event.contains(engine, 'before_cursor_execute',
+                          _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def pool_status(engine: Engine) -> dict:
+    """
+    Текущее состояние пула соединений движка.
+
+    Attributes:
+    -----------
+    engine : Engine Синхронный движок (для AsyncEngine - sync_engine).
+
+    Returns:
+    --------
+    dict    Класс пула, размер, занятые и свободные соединения, overflow
+            и накопленное ожидание соединения.
+    """
+    pool = engine.pool
+    pool_wait = _engines.get(engine, PoolWaitStats())
+    status = {'url': engine.url.render_as_string(hide_password=True),
+              'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(),
+                      max_overflow=pool._max_overflow,
+                      timeout=pool.timeout(),
+                      checked_out=pool.checkedout(),
+                      checked_in=pool.checkedin(),
+                      overflow=max(pool.overflow(), 0))
+    status['wait'] = {'count': pool_wait.count,
+                      'total_seconds': pool_wait.total,
+                      'max_seconds': pool_wait.max}
+    return status
+
+
+def collect_pool_status() -> Iterable[str]:
+    """Состояние пулов соединений в текстовом формате Prometheus."""
+    statuses = [pool_status(engine) for engine in _engines]
+    for name, key, documentation in (
+            ('db_pool_size', 'size', 'Размер пула соединений'),
+            ('db_pool_checked_out', 'checked_out', 'Занятые соединения'),
+            ('db_pool_overflow', 'overflow',
+             'Соединения сверх размера пула')):
+        yield f'# HELP {name} {documentation}'
+        yield f'# TYPE {name} gauge'
+        for status in statuses:
+            if key in status:
+                yield f'{name}{{url="{status["url"]}"}} {status[key]}'
+    for name, key, documentation in (
+            ('db_pool_wait_count', 'count', 'Полученные из пула соединения'),
+            ('db_pool_wait_seconds', 'total_seconds',
+             'Суммарное ожидание соединения из пула')):
+        yield f'# HELP {name} {documentation}'
+        yield f'# TYPE {name} counter'
+        for status in statuses:
+            yield (f'{name}_total{{url="{status["url"]}"}} '
+                   f'{status["wait"][key]}')
+
+
+# Время ожидания соединения считается для всех сессий приложения
+event.listen(Session, 'do_orm_execute', _do_orm_execute)
+event.listen(Session, 'after_begin', _after_begin)
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus с метками route и method.
+
+    Attributes:
+    -----------
+    name : str  Имя метрики.
+    documentation : str Описание метрики.
+    buckets : tuple     Верхние границы корзин.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.setdefault(
+            labels, [[0] * len(self.buckets), 0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def collect(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, (buckets, total, count) in sorted(self._series.items()):
+            label_text = _labels(labels)
+            for bound, bucket_count in zip(self.buckets, buckets):
+                yield (f'{self.name}_bucket{{{label_text},le="{bound}"}} '
+                       f'{bucket_count}')
+            yield f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}'
+            yield f'{self.name}_sum{{{label_text}}} {total}'
+            yield f'{self.name}_count{{{label_text}}} {count}'
+
+
+class CounterMetric:
+    """Счетчик в формате Prometheus с метками route и method."""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._series: dict[tuple, int] = {}
+
+    def inc(self, labels: tuple, value: int = 1) -> None:
+        self._series[labels] = self._series.get(labels, 0) + value
+
+    def collect(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self._series.items()):
+            yield f'{self.name}_total{{{_labels(labels)}}} {value}'
+
+
+def _labels(labels: tuple) -> str:
+    route, method = labels
+    return f'route="{route}",method="{method}"'
+
+
+REQUEST_DURATION = Histogram('http_request_duration_seconds',
+                             'Длительность обработки HTTP-запроса',
+                             TIME_BUCKETS)
+DB_TIME = Histogram('db_time_seconds',
+                    'Время выполнения SQL-запросов за HTTP-запрос',
+                    TIME_BUCKETS)
+DB_STATEMENTS = Histogram('db_statements_per_request',
+                          'Количество SQL-запросов за HTTP-запрос',
+                          COUNT_BUCKETS)
+DB_ROWS = Histogram('db_rows_per_request',
+                    'Количество строк, полученных из БД за HTTP-запрос',
+                    COUNT_BUCKETS)
+DB_POOL_WAIT = Histogram('db_pool_wait_seconds',
+                         'Время ожидания соединения из пула за HTTP-запрос',
+                         TIME_BUCKETS)
+DB_REPEATED = CounterMetric('db_repeated_statements',
+                            'Запросы с повторяющимися SELECT (признак N+1)')
+
+# Функции, возвращающие дополнительные строки для /metrics
+collectors: list[Callable[[], Iterable[str]]] = [
+    REQUEST_DURATION.collect, DB_TIME.collect, DB_STATEMENTS.collect,
+    DB_ROWS.collect, DB_POOL_WAIT.collect, DB_REPEATED.collect,
+    collect_pool_status,
+]
+
+
+class SQLMetricsMiddleware:
+    """
+    ASGI middleware, собирающее статистику SQL по каждому HTTP-запросу.
+
+    Добавляет в ответ заголовок Server-Timing (время в БД, ожидание пула,
+    количество запросов и строк), пополняет гистограммы для /metrics
+    и пишет предупреждение, если один и тот же SELECT выполнился
+    больше SQL_REPEAT_THRESHOLD раз (N+1).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing',
+                                _server_timing(stats, started).encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._record(scope, stats, time.perf_counter() - started)
+
+    @staticmethod
+    def _record(scope, stats: RequestStats, duration: float) -> None:
+        route = scope.get('route')
+        labels = (route.path if route else 'unmatched', scope['method'])
+        REQUEST_DURATION.observe(labels, duration)
+        DB_TIME.observe(labels, stats.db_time)
+        DB_STATEMENTS.observe(labels, stats.statements)
+        DB_ROWS.observe(labels, stats.rows)
+        DB_POOL_WAIT.observe(labels, stats.pool_wait)
+        repeats = stats.max_repeats()
+        if repeats > SQL_REPEAT_THRESHOLD:
+            DB_REPEATED.inc(labels)
+            statement, _ = stats.repeated.most_common(1)[0]
+            logger.warning('N+1: %s %s выполнил один SELECT %d раз: %s',
+                           labels[1], labels[0], repeats, statement)
+
+
+def _server_timing(stats: RequestStats, started: float) -> str:
+    return (f'db;dur={stats.db_time * 1000:.2f}, '
+            f'pool;dur={stats.pool_wait * 1000:.2f}, '
+            f'sql;desc="statements={stats.statements} rows={stats.rows} '
+            f'max_repeats={stats.max_repeats()}", '
+            f'app;dur={(time.perf_counter() - started) * 1000:.2f}')
+
+
+api_metrics = APIRouter(tags=['Метрики'])
+
+
+@api_metrics.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Метрики процесса в текстовом формате Prometheus.
+
+    Returns:
+    --------
+    PlainTextResponse   Метрики по роутам: длительность, время в БД,
+                        количество SQL-запросов и строк, ожидание пула.
+    """
+    lines = [line for collect in collectors for line in collect()]
+    return PlainTextResponse('\n'.join(lines) + '\n',
+                             media_type='text/plain; version=0.0.4')
+
+
+def require_metrics_token(
+        x_metrics_token: str | None = Header(None)) -> None:
+    """
+    Проверка токена служебного роута (заголовок X-Metrics-Token).
+
+    Attributes:
+    -----------
+    x_metrics_token : str | None    Переданный токен.
+    """
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='Not Found')
+    if not (x_metrics_token and
+            secrets.compare_digest(x_metrics_token, METRICS_TOKEN)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail='Неверный токен')
+
+
+@api_metrics.get('/metrics/pool',
+                 dependencies=[Depends(require_metrics_token)])
+async def get_pool_status() -> dict:
+    """
+    Состояние пулов соединений с БД для подбора размера пула и числа воркеров.
+
+    Роут служебный: доступен только с токеном METRICS_TOKEN.
+
+    Returns:
+    --------
+    dict    Состояние пула каждого движка приложения.
+    """
+    return {'status': 'success',
+            'pools': [pool_status(engine) for engine in _engines]}
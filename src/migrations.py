@@ -0,0 +1,134 @@
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import (Column, Engine, String, TIMESTAMP, inspect, select,
+                        text)
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+from src.employee.model import Base
+# Модели импортируются, чтобы их таблицы попали в Base.metadata
+from src.tasks import model as _tasks_model  # noqa: F401
+from src.tasks.counters import (counter_ddl, create_counter_triggers,
+                                repair_task_counts)
+from src.tasks.search import create_search_index, search_ddl
+from src import versioning as _versioning  # noqa: F401
+from src.events import events_ddl
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock PostgreSQL: одновременно схему обновляет один процесс
+MIGRATION_LOCK_KEY = 7301
+
+
+class SchemaMigration(Base):
+    """
+    Примененная версия схемы БД.
+
+    Attributes:
+    -----------
+    fingerprint : str   Хэш DDL всех таблиц и индексов моделей.
+    applied_at : datetime   Время применения.
+    """
+    __tablename__ = 'schema_migration'
+
+    fingerprint = Column(String, primary_key=True)
+    applied_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+
+def schema_fingerprint(engine: Engine) -> str:
+    """
+    Хэш схемы, описанной моделями, в диалекте движка.
+
+    Меняется при добавлении таблиц, колонок и индексов, поэтому
+    по нему видно, применена ли текущая схема.
+    """
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=engine.dialect)))
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=engine.dialect))
+            for index in sorted(table.indexes, key=lambda index: index.name))
+    # Поисковый индекс, триггеры счетчиков задач и последовательность
+    # номеров событий создаются DDL вне моделей (src.tasks.search,
+    # src.tasks.counters, src.events)
+    statements.extend(search_ddl(engine.dialect.name))
+    statements.extend(counter_ddl(engine.dialect.name))
+    statements.extend(events_ddl(engine.dialect.name))
+    return hashlib.sha1('\n'.join(statements).encode()).hexdigest()
+
+
+def is_migrated(engine: Engine) -> bool:
+    """Проверка, что текущая схема уже применена (один SELECT, без DDL)."""
+    fingerprint = schema_fingerprint(engine)
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(SchemaMigration.__tablename__):
+            return False
+        return conn.scalar(
+            select(SchemaMigration.fingerprint).
+            filter(SchemaMigration.fingerprint == fingerprint)) is not None
+
+
+def _add_missing_columns(conn, table) -> None:
+    existing = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing:
+            conn.execute(text(
+                f'ALTER TABLE {table.name} ADD COLUMN '
+                f'{CreateColumn(column).compile(dialect=conn.dialect)}'))
+            logger.info('Добавлена колонка %s.%s', table.name, column.name)
+
+
+def migrate(engine: Engine) -> bool:
+    """
+    Приведение схемы БД к описанной моделями.
+
+    Создает недостающие таблицы, колонки и индексы (только добавление,
+    без удаления и изменения существующих объектов) и запоминает хэш
+    схемы. Повторный запуск с той же схемой ничего не делает, а в
+    PostgreSQL параллельные запуски ждут друг друга на advisory lock,
+    поэтому схему обновляет первый процесс после деплоя.
+
+    Attributes:
+    -----------
+    engine : Engine Синхронный движок БД.
+
+    Returns:
+    --------
+    bool    True, если схема была обновлена.
+    """
+    fingerprint = schema_fingerprint(engine)
+    with engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text('SELECT pg_advisory_xact_lock(:key)'),
+                         {'key': MIGRATION_LOCK_KEY})
+        if (inspect(conn).has_table(SchemaMigration.__tablename__) and
+                conn.scalar(select(SchemaMigration.fingerprint).filter(
+                    SchemaMigration.fingerprint == fingerprint)) is not None):
+            return False
+
+        existing_tables = set(inspect(conn).get_table_names())
+        Base.metadata.create_all(bind=conn)
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            _add_missing_columns(conn, table)
+            existing_indexes = {index['name'] for index
+                                in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
+                    logger.info('Создан индекс %s', index.name)
+            if table.name == _tasks_model.Task.__tablename__:
+                create_search_index(conn)
+                create_counter_triggers(conn)
+                # Задачи, записанные до появления триггеров, не учтены
+                # в счетчиках
+                fixed = repair_task_counts(conn)
+                if fixed:
+                    logger.info('Исправлены счетчики задач: %s', fixed)
+
+        conn.execute(SchemaMigration.__table__.insert().values(
+            fingerprint=fingerprint, applied_at=datetime.now(timezone.utc)))
+    logger.info('Схема БД обновлена до %s', fingerprint)
+    return True
@@ -0,0 +1,151 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def paginate(query: Select, limit: int | None, page: int) -> Select:
+    """
+    Добавление к запросу LIMIT/OFFSET, если задан размер страницы.
+
+    Attributes:
+    -----------
+    query : Select  Исходный запрос.
+    limit : int | None  Количество записей на страницу (None - без ограничения).
+    page : int  Номер страницы.
+
+    Returns:
+    --------
+    Select  Запрос с пагинацией.
+    """
+    if limit is None:
+        return query
+    return query.limit(limit).offset((page - 1) * limit)
+
+
+def encode_cursor(sort_value: datetime | None, row_id: UUID) -> str:
+    """
+    Кодирование позиции последней записи страницы в непрозрачный курсор.
+
+    Attributes:
+    -----------
+    sort_value : datetime | None    Значение колонки сортировки.
+    row_id : UUID   Идентификатор записи.
+
+    Returns:
+    --------
+    str Курсор для запроса следующей страницы.
+    """
+    raw = json.dumps([sort_value.isoformat() if sort_value else None,
+                      str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, UUID]:
+    """
+    Декодирование курсора, полученного от encode_cursor.
+
+    Attributes:
+    -----------
+    cursor : str    Курсор.
+
+    Returns:
+    --------
+    tuple[datetime | None, UUID]    Значение колонки сортировки и ID записи.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(sort_value) if sort_value else None,
+                UUID(row_id))
+    except (binascii.Error, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail='Некорректный курсор')
+
+
+async def keyset_paginate(db: AsyncSession,
+                          query: Select,
+                          sort_column: InstrumentedAttribute,
+                          id_column: InstrumentedAttribute,
+                          limit: int,
+                          cursor: str | None = None,
+                          page: int = 1,
+                          entities: bool = False) -> list[Any]:
+    """
+    Страница записей по ключу (sort_column, id) с сортировкой NULLS LAST.
+
+    Следующая страница выбирается условием по значениям последней записи
+    предыдущей страницы, поэтому ее стоимость не зависит от номера
+    страницы. Записи с непустой колонкой сортировки выбираются сравнением
+    (sort_column, id) > (значение, id), которое читается по индексу
+    (sort_column, id) с нужного места; записи с NULL (хвост NULLS LAST)
+    дочитываются отдельным запросом по id, если страница не заполнена.
+    Номер страницы (OFFSET) поддерживается только для обратной
+    совместимости и используется, если курсор не передан.
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    query : Select  Исходный запрос.
+    sort_column : InstrumentedAttribute Колонка сортировки (может быть NULL).
+    id_column : InstrumentedAttribute   Колонка с уникальным ID.
+    limit : int Количество записей на страницу.
+    cursor : str | None Курсор, полученный в next_cursor.
+    page : int  Номер страницы.
+    entities : bool Запрос выбирает ORM-объекты (результат - scalars).
+
+    Returns:
+    --------
+    list    Записи страницы.
+    """
+    async def fetch(page_query: Select) -> list[Any]:
+        result = await db.execute(page_query)
+        return (result.unique().scalars().all() if entities
+                else result.all())
+
+    if cursor is None:
+        return await fetch(
+            query.order_by(sort_column.asc().nulls_last(), id_column.asc()).
+            limit(limit).offset((page - 1) * limit))
+
+    null_tail = query.filter(sort_column.is_(None)).order_by(id_column.asc())
+    sort_value, row_id = decode_cursor(cursor)
+    if sort_value is None:
+        return await fetch(null_tail.filter(id_column > row_id).limit(limit))
+    rows = list(await fetch(
+        query.filter(tuple_(sort_column, id_column) >
+                     tuple_(sort_value, row_id)).
+        order_by(sort_column.asc(), id_column.asc()).
+        limit(limit)))
+    if len(rows) < limit:
+        rows.extend(await fetch(null_tail.limit(limit - len(rows))))
+    return rows
+
+
+def next_cursor(rows: list[Any], limit: int,
+                sort_attr: str, id_attr: str = 'id') -> str | None:
+    """
+    Курсор следующей страницы или None, если страница последняя.
+
+    Attributes:
+    -----------
+    rows : list Записи текущей страницы.
+    limit : int Количество записей на страницу.
+    sort_attr : str Имя атрибута колонки сортировки.
+    id_attr : str   Имя атрибута ID.
+
+    Returns:
+    --------
+    str | None  Курсор следующей страницы.
+    """
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
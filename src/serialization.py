@@ -0,0 +1,78 @@
+from typing import Any, List
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.engine import Row, RowMapping
+
+from src.employee.schema import EmployeeSchema
+from src.tasks.schema import TaskSchema
+
+
+class TaskWithParentSchema(TaskSchema):
+    """Схема задачи вместе с родительской задачей."""
+    parent_task: TaskSchema | None = None
+
+
+class TaskDetailSchema(TaskWithParentSchema):
+    """Схема карточки задачи: исполнитель, родительская и дочерние задачи."""
+    employees: EmployeeSchema | None = None
+    child_task: List[TaskSchema] = []
+
+
+class EmployeeDetailSchema(EmployeeSchema):
+    """Схема карточки сотрудника вместе с его задачами."""
+    tasks: List[TaskSchema] = []
+
+
+# Валидаторы и сериализаторы строятся один раз при импорте,
+# а не на каждый запрос
+TASK_DETAIL = TypeAdapter(TaskDetailSchema)
+TASKS_WITH_PARENT = TypeAdapter(List[TaskWithParentSchema])
+EMPLOYEE_DETAIL = TypeAdapter(EmployeeDetailSchema)
+
+
+def to_json(adapter: TypeAdapter, value: Any) -> orjson.Fragment:
+    """
+    Сериализация ORM-объектов по схеме адаптера в готовый фрагмент JSON.
+
+    Attributes:
+    -----------
+    adapter : TypeAdapter   Адаптер схемы ответа.
+    value : Any     ORM-объект или список объектов.
+
+    Returns:
+    --------
+    orjson.Fragment JSON, который вставляется в ответ без повторного разбора.
+    """
+    return orjson.Fragment(adapter.dump_json(
+        adapter.validate_python(value, from_attributes=True)))
+
+
+def _default(value: Any) -> Any:
+    # Строки результата запроса сериализуются без промежуточных моделей
+    if isinstance(value, RowMapping):
+        return dict(value)
+    if isinstance(value, Row):
+        return value._asdict()
+    if isinstance(value, BaseModel):
+        return orjson.Fragment(value.__pydantic_serializer__.to_json(value))
+    raise TypeError(f'Тип {type(value)} не сериализуется в JSON')
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Сериализация ответа в JSON через orjson.
+
+    UUID и datetime сериализуются orjson напрямую, строки результата
+    запроса (Row, RowMapping) - как словари колонок.
+    """
+    return orjson.dumps(content, default=_default,
+                        option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON-ответ, сериализуемый orjson (класс ответа по умолчанию)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,137 @@
+from sqlalchemy import Connection, Update, event, func, select, text, update
+
+from src.employee.model import Employee
+from src.tasks.model import Task, OPEN_STATUSES
+
+# Триггеры на task поддерживают employee.active_task_count - количество
+# незавершенных задач (OPEN_STATUSES) сотрудника - в той же транзакции,
+# что и изменение задачи, для любых путей записи: ORM, пакетные
+# INSERT/UPDATE, DELETE ... RETURNING, COPY при загрузке данных.
+# В PostgreSQL триггеры уровня оператора с таблицами переходов, поэтому
+# пакетное назначение задач обновляет каждого сотрудника один раз
+_OPEN = f"status IN ({', '.join(map(str, OPEN_STATUSES))})"
+
+_PG_DDL = [
+    f"""CREATE OR REPLACE FUNCTION task_employee_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE employee SET active_task_count = active_task_count + d.delta
+        FROM (SELECT employee_id, count(*) AS delta FROM new_rows
+              WHERE employee_id IS NOT NULL AND {_OPEN}
+              GROUP BY employee_id) d
+        WHERE employee.id = d.employee_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE employee SET active_task_count = active_task_count - d.delta
+        FROM (SELECT employee_id, count(*) AS delta FROM old_rows
+              WHERE employee_id IS NOT NULL AND {_OPEN}
+              GROUP BY employee_id) d
+        WHERE employee.id = d.employee_id;
+    ELSE
+        -- Задача учитывается у нового исполнителя, если она осталась
+        -- незавершенной, и списывается с прежнего, если была такой;
+        -- для строк без изменений исполнителя и статуса сумма равна нулю
+        UPDATE employee SET active_task_count = active_task_count + d.delta
+        FROM (SELECT employee_id, sum(delta) AS delta FROM (
+                  SELECT employee_id, 1 AS delta FROM new_rows
+                  WHERE {_OPEN}
+                  UNION ALL
+                  SELECT employee_id, -1 FROM old_rows
+                  WHERE {_OPEN}) changes
+              WHERE employee_id IS NOT NULL GROUP BY employee_id) d
+        WHERE employee.id = d.employee_id AND d.delta <> 0;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS task_employee_count_insert ON task",
+    "CREATE TRIGGER task_employee_count_insert AFTER INSERT ON task "
+    "REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION task_employee_count()",
+    "DROP TRIGGER IF EXISTS task_employee_count_update ON task",
+    "CREATE TRIGGER task_employee_count_update AFTER UPDATE ON task "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION task_employee_count()",
+    "DROP TRIGGER IF EXISTS task_employee_count_delete ON task",
+    "CREATE TRIGGER task_employee_count_delete AFTER DELETE ON task "
+    "REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION task_employee_count()",
+]
+
+# Триггеры пересоздаются, чтобы migrate заменил триггеры прежней версии
+_SQLITE_DDL = [
+    "DROP TRIGGER IF EXISTS task_employee_count_insert",
+    "CREATE TRIGGER task_employee_count_insert "
+    "AFTER INSERT ON task WHEN new.employee_id IS NOT NULL "
+    f"AND new.{_OPEN} BEGIN "
+    "UPDATE employee SET active_task_count = active_task_count + 1 "
+    "WHERE id = new.employee_id; END",
+    "DROP TRIGGER IF EXISTS task_employee_count_update",
+    "CREATE TRIGGER task_employee_count_update "
+    "AFTER UPDATE OF employee_id, status ON task "
+    "WHEN old.employee_id IS NOT new.employee_id "
+    "OR old.status IS NOT new.status BEGIN "
+    "UPDATE employee SET active_task_count = active_task_count - 1 "
+    f"WHERE id = old.employee_id AND old.{_OPEN}; "
+    "UPDATE employee SET active_task_count = active_task_count + 1 "
+    f"WHERE id = new.employee_id AND new.{_OPEN}; END",
+    "DROP TRIGGER IF EXISTS task_employee_count_delete",
+    "CREATE TRIGGER task_employee_count_delete "
+    "AFTER DELETE ON task WHEN old.employee_id IS NOT NULL "
+    f"AND old.{_OPEN} BEGIN "
+    "UPDATE employee SET active_task_count = active_task_count - 1 "
+    "WHERE id = old.employee_id; END",
+]
+
+
+def counter_ddl(dialect_name: str) -> list[str]:
+    """DDL триггеров счетчика задач сотрудников для диалекта."""
+    return {'postgresql': _PG_DDL, 'sqlite': _SQLITE_DDL}.get(dialect_name, [])
+
+
+def create_counter_triggers(connection: Connection) -> None:
+    """Создание (пересоздание) триггеров счетчика задач сотрудников."""
+    for statement in counter_ddl(connection.dialect.name):
+        connection.execute(text(statement))
+
+
+@event.listens_for(Task.__table__, 'after_create')
+def _create_counter_triggers(target, connection, **kw):
+    create_counter_triggers(connection)
+
+
+def repair_statement() -> Update:
+    """
+    Запрос, пересчитывающий active_task_count по незавершенным задачам.
+
+    Обновляются только сотрудники с расхождением, поэтому количество
+    измененных строк - это количество исправленных счетчиков.
+    """
+    task_count = (select(func.count(Task.id)).
+                  filter(Task.employee_id == Employee.id,
+                         Task.status.in_(OPEN_STATUSES)).
+                  scalar_subquery())
+    return (update(Employee).
+            filter(Employee.active_task_count != task_count).
+            values(active_task_count=task_count).
+            execution_options(synchronize_session=False))
+
+
+def repair_task_counts(connection: Connection) -> int:
+    """
+    Приведение счетчиков задач сотрудников в соответствие с таблицей задач.
+
+    В PostgreSQL на время пересчета запись в task блокируется
+    (SHARE MODE), чтобы триггеры параллельных транзакций не изменили
+    счетчики между подсчетом и записью.
+
+    Attributes:
+    -----------
+    connection : Connection Соединение с открытой транзакцией.
+
+    Returns:
+    --------
+    int Количество исправленных счетчиков.
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('LOCK TABLE task IN SHARE MODE'))
+    return connection.execute(repair_statement()).rowcount
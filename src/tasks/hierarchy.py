@@ -0,0 +1,83 @@
+from uuid import UUID
+
+from sqlalchemy import Select, func, literal, select
+from sqlalchemy.orm import aliased
+
+from src.tasks.model import Task
+
+# Предел глубины обхода: защищает рекурсивный запрос от зацикливания,
+# если parent_id по ошибке образует цикл
+MAX_TREE_DEPTH = 100
+
+
+def _tree_depth(max_depth: int | None) -> int:
+    if max_depth is None:
+        return MAX_TREE_DEPTH
+    return min(max_depth, MAX_TREE_DEPTH)
+
+
+def subtree_cte(task_id: UUID, max_depth: int | None = None):
+    """
+    Рекурсивный CTE: задача и все ее потомки с глубиной относительно нее.
+
+    Attributes:
+    -----------
+    task_id : UUID  ID корневой задачи.
+    max_depth : int | None  Максимальная глубина потомков (0 - только корень).
+
+    Returns:
+    --------
+    CTE с колонками id и depth.
+    """
+    tree = (select(Task.id, literal(0).label('depth')).
+            filter(Task.id == task_id).
+            cte('subtree', recursive=True))
+    child = aliased(Task)
+    return tree.union_all(
+        select(child.id, tree.c.depth + 1).
+        join(tree, child.parent_id == tree.c.id).
+        filter(tree.c.depth < _tree_depth(max_depth)))
+
+
+def ancestors_cte(task_id: UUID, max_depth: int | None = None):
+    """
+    Рекурсивный CTE: задача и цепочка ее родительских задач.
+
+    Attributes:
+    -----------
+    task_id : UUID  ID задачи.
+    max_depth : int | None  Сколько уровней вверх подниматься.
+
+    Returns:
+    --------
+    CTE с колонками id, parent_id и depth (1 - непосредственный родитель).
+    """
+    tree = (select(Task.id, Task.parent_id, literal(0).label('depth')).
+            filter(Task.id == task_id).
+            cte('ancestors', recursive=True))
+    parent = aliased(Task)
+    return tree.union_all(
+        select(parent.id, parent.parent_id, tree.c.depth + 1).
+        join(tree, parent.id == tree.c.parent_id).
+        filter(tree.c.depth < _tree_depth(max_depth)))
+
+
+def tree_nodes_query(tree) -> Select:
+    """Задачи из CTE обхода дерева с глубиной, ближние уровни первыми."""
+    return (select(*Task.__table__.c, tree.c.depth).
+            join(tree, Task.id == tree.c.id).
+            order_by(tree.c.depth, Task.id))
+
+
+def tree_rollup_query(tree) -> Select:
+    """Количество задач поддерева по статусам."""
+    return (select(Task.status, func.count(Task.id).label('count')).
+            join(tree, Task.id == tree.c.id).
+            group_by(Task.status))
+
+
+def status_rollup(statuses: dict[int, int]) -> dict:
+    """Сводка по задачам (поддереву, выборке): общее количество задач и количество по статусам."""
+    return {'total': sum(statuses.values()),
+            'statuses': {str(task_status): count for task_status, count
+                         in sorted(statuses.items())}}
@@ -1,11 +1,15 @@
 import uuid
 
-from sqlalchemy import (Column, Integer, String, Text, ForeignKey, TIMESTAMP)
+from sqlalchemy import (Column, Integer, String, Text, ForeignKey, TIMESTAMP,
+                        Index, text)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from src.employee.model import Base
 
+# Статусы незавершенных задач: 0 - не взята в работу, 1 - в работе
+OPEN_STATUSES = (0, 1)
+
 
 class Task(Base):
     """
@@ -25,6 +29,20 @@ class Task(Base):
        parent_task : relationship   Отношение "один ко многим" с родительской задачей.
     """
     __tablename__ = 'task'
+    __table_args__ = (
+        # Ключ пагинации списков задач (см. src.pagination.keyset_paginate)
+        Index('ix_task_period_of_execution_id', 'period_of_execution', 'id'),
+        # Списки задач по статусу (свободные, важные) с той же сортировкой
+        Index('ix_task_status_period_of_execution_id',
+              'status', 'period_of_execution', 'id'),
+        # Соединение задачи с родительской при отборе важных задач
+        Index('ix_task_parent_id_status', 'parent_id', 'status'),
+        # Сроки незавершенных задач (/tasks/due); в PostgreSQL индекс
+        # частичный и не содержит закрытых задач
+        Index('ix_task_open_period_of_execution_status',
+              'period_of_execution', 'status',
+              postgresql_where=text(f'status IN {OPEN_STATUSES}')),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, nullable=False,
                 default=uuid.uuid4)
@@ -38,20 +56,21 @@ class Task(Base):
         UUID(
             as_uuid=True),
         ForeignKey('employee.id'),
-        nullable=True)
+        nullable=True,
+        index=True)
 
-    employees = relationship("Employee", back_populates='tasks', lazy='joined')
+    employees = relationship("Employee", back_populates='tasks', lazy='raise')
 
     child_task = relationship(
         "Task",
         back_populates='parent_task',
-        lazy='joined')
+        lazy='raise')
     parent_task = relationship(
         "Task",
         remote_side='Task.id',
         back_populates='child_task',
         foreign_keys=[parent_id],
-        lazy='joined')
+        lazy='raise')
 
     def __repr__(self):
         return (f"Task(name='{self.name}', "
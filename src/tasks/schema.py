@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import List
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 
 class BaseTaskSchema(BaseModel):
@@ -68,5 +68,27 @@ class TasksList(BaseModel):
     Attributes:
     -----------
         tasks : List[TaskSchema]
+        next_cursor : Optional[str] Курсор следующей страницы.
     """
     tasks: List[TaskSchema]
+    next_cursor: str | None = None
+
+
+class TaskBatchAssignSchema(BaseModel):
+    """
+    Схема пакетного назначения исполнителей важным задачам.
+
+    Attributes:
+    -----------
+        task_ids : Optional[List[UUID]]    ID задач для назначения.
+        all_important : bool    Назначить исполнителей всем текущим важным задачам.
+    """
+    task_ids: List[UUID] | None = None
+    all_important: bool = False
+
+    @model_validator(mode='after')
+    def check_target(self) -> 'TaskBatchAssignSchema':
+        """Проверка, что задан ровно один способ выбора задач."""
+        if (self.task_ids is None) == (not self.all_important):
+            raise ValueError('Укажите либо task_ids, либо all_important')
+        return self
@@ -0,0 +1,179 @@
+import re
+
+from sqlalchemy import (Connection, Select, case, event, func, inspect,
+                        literal_column, select, table, column, text)
+
+from src.tasks.model import Task
+
+# Конфигурация полнотекстового поиска PostgreSQL (словарь и стемминг)
+SEARCH_CONFIG = 'russian'
+# Колонка tsvector и ее GIN-индекс (PostgreSQL)
+SEARCH_VECTOR_COLUMN = 'search_vector'
+SEARCH_INDEX = 'ix_task_search_vector'
+# Индекс FTS5 поверх таблицы task (SQLite)
+FTS_TABLE = 'task_fts'
+# Обрамление найденных слов во фрагменте текста
+HIGHLIGHT_START = '<b>'
+HIGHLIGHT_STOP = '</b>'
+
+_PG_DDL = [
+    # Генерируемая колонка пересчитывается самой БД при INSERT и UPDATE,
+    # а при добавлении к существующей таблице заполняется для всех строк
+    f"ALTER TABLE task ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} "
+    f"tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')"
+    f") STORED",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON task "
+    f"USING gin ({SEARCH_VECTOR_COLUMN})",
+]
+
+# Индекс хранит ссылку на rowid задачи, а текст читает из самой task.
+# VACUUM может перенумеровать rowid, после него индекс нужно
+# перестроить: INSERT INTO task_fts(task_fts) VALUES ('rebuild')
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, content, content='task', content_rowid='rowid', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON task BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, content) "
+    f"VALUES (new.rowid, new.name, new.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON task BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, content) "
+    f"VALUES ('delete', old.rowid, old.name, old.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF name, content ON task BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, content) "
+    f"VALUES ('delete', old.rowid, old.name, old.content); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, content) "
+    f"VALUES (new.rowid, new.name, new.content); END",
+]
+
+
+def search_ddl(dialect_name: str) -> list[str]:
+    """DDL поискового индекса задач для диалекта (пустой, если не поддерживается)."""
+    return {'postgresql': _PG_DDL, 'sqlite': _SQLITE_DDL}.get(dialect_name, [])
+
+
+def create_search_index(connection: Connection) -> None:
+    """
+    Создание поискового индекса задач, если его еще нет.
+
+    Вызывается после создания таблицы task и из migrate для уже
+    существующей таблицы; индекс SQLite при создании заполняется
+    текущими задачами.
+    """
+    rebuild = (connection.dialect.name == 'sqlite' and
+               not inspect(connection).has_table(FTS_TABLE))
+    for statement in search_ddl(connection.dialect.name):
+        connection.execute(text(statement))
+    if rebuild:
+        connection.execute(text(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(Task.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    create_search_index(connection)
+
+
+def fts_match(q: str) -> str | None:
+    """
+    Запрос FTS5 из пользовательской строки: все слова обязательны.
+
+    Слова берутся в кавычки, поэтому операторы и спецсимволы FTS5
+    в строке поиска не приводят к ошибке синтаксиса.
+    """
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def _pg_search_query(q: str, limit: int, offset: int) -> Select:
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    tsquery = func.websearch_to_tsquery(config, q)
+    vector = literal_column(f'task.{SEARCH_VECTOR_COLUMN}')
+    rank = func.ts_rank_cd(vector, tsquery).label('rank')
+    # Фрагменты (ts_headline) строятся только для задач текущей страницы
+    page = (select(*Task.__table__.c, rank).
+            filter(vector.op('@@')(tsquery)).
+            order_by(rank.desc(), Task.id).
+            limit(limit).offset(offset).
+            subquery('page'))
+    snippet = func.ts_headline(
+        config, page.c.content, tsquery,
+        f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+        f'MaxFragments=2, MaxWords=20, MinWords=5').label('snippet')
+    return (select(*page.c, snippet).
+            order_by(page.c.rank.desc(), page.c.id))
+
+
+def _sqlite_search_query(q: str, limit: int, offset: int) -> Select | None:
+    match = fts_match(q)
+    if match is None:
+        return None
+    fts = table(FTS_TABLE, column('rowid'))
+    fts_column = literal_column(FTS_TABLE)
+    # bm25 тем меньше, чем лучше совпадение; совпадение в названии весит
+    # больше, чем в содержании (как веса A и B в PostgreSQL)
+    rank = (-func.bm25(fts_column, 10.0, 1.0)).label('rank')
+    snippet = func.snippet(fts_column, 1, HIGHLIGHT_START, HIGHLIGHT_STOP,
+                           '…', 16).label('snippet')
+    return (select(*Task.__table__.c, rank, snippet).
+            select_from(fts).
+            join(Task.__table__, literal_column('task.rowid') == fts.c.rowid).
+            filter(fts_column.op('MATCH')(match)).
+            order_by(rank.desc(), Task.id).
+            limit(limit).offset(offset))
+
+
+def _like_search_query(q: str, limit: int, offset: int) -> Select | None:
+    # Без полнотекстового индекса: каждое слово ищется подстрокой
+    # (ILIKE) в названии или содержании, полным просмотром таблицы
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+    name_matches = [Task.name.icontains(word, autoescape=True)
+                    for word in words]
+    content_matches = [Task.content.icontains(word, autoescape=True)
+                       for word in words]
+    # Совпадение в названии весит больше, чем в содержании
+    rank = sum(case((match, weight), else_=0)
+               for matches, weight in ((name_matches, 10),
+                                       (content_matches, 1))
+               for match in matches).label('rank')
+    snippet = func.substr(Task.content, 1, 200).label('snippet')
+    return (select(*Task.__table__.c, rank, snippet).
+            filter(*(name | content for name, content
+                     in zip(name_matches, content_matches))).
+            order_by(rank.desc(), Task.id).
+            limit(limit).offset(offset))
+
+
+def search_query(dialect_name: str, q: str, limit: int,
+                 page: int = 1) -> Select | None:
+    """
+    Запрос полнотекстового поиска задач по названию и содержанию.
+
+    Attributes:
+    -----------
+    dialect_name : str  Диалект БД (postgresql или sqlite).
+    q : str     Строка поиска.
+    limit : int Количество задач на страницу.
+    page : int  Номер страницы.
+
+    Для СУБД без поддержки полнотекстового индекса используется поиск
+    подстрок (ILIKE) без подсветки во фрагменте.
+
+    Returns:
+    --------
+    Select | None   Колонки задачи, rank (больше - релевантнее) и snippet;
+                    None, если в строке нет слов для поиска.
+    """
+    offset = (page - 1) * limit
+    if dialect_name == 'postgresql':
+        return _pg_search_query(q, limit, offset)
+    if dialect_name == 'sqlite':
+        return _sqlite_search_query(q, limit, offset)
+    return _like_search_query(q, limit, offset)
@@ -1,226 +1,825 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Body
-from fastapi.openapi.models import Response
-from sqlalchemy.orm import Session
-
-from src.db_connect import get_db
-from src.employee.model import Employee
-from src.employee.services import count_tasks
-from src.tasks.model import Task
-from src.tasks.schema import TasksList, TaskCreateUpdateSchema
+import uuid
+from datetime import datetime, timezone
+from uuid import UUID
+
+from fastapi import (APIRouter, Depends, status, HTTPException, Body, Response,
+                     Request, Query)
+from sqlalchemy import select, update, delete, exists, literal, func, Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import joinedload, aliased, contains_eager, selectinload
+from sqlalchemy.orm.util import AliasedClass
+
+from src.bulk import iter_valid_chunks, insert_ignore_conflicts, ID_CHUNK_SIZE
+from src.cache import response_cache, task_key, employee_key, cached_response
+from src.db_connect import get_db, get_sessionmaker
+from src.employee.model import Employee, is_draining
+from src.events import emit
+from src.export import export_response
+from src.pagination import keyset_paginate, next_cursor
+from src.serialization import (ORJSONResponse, TASK_DETAIL, TASKS_WITH_PARENT,
+                               to_json, dumps)
+from src.tasks.hierarchy import (subtree_cte, ancestors_cte, tree_nodes_query,
+                                 tree_rollup_query, status_rollup)
+from src.tasks.model import Task, OPEN_STATUSES
+from src.tasks.search import search_query
+from src.tasks.schema import (TasksList, TaskCreateUpdateSchema,
+                              TaskBatchAssignSchema)
+from src.tasks.workload import WorkloadIndex, task_load, workload_index
+from src.versioning import bump_versions, list_etag, etag_matches, not_modified
 
 api_task = APIRouter(tags=['Tasks'], prefix='/tasks')
 
+# Связи модели по умолчанию не загружаются (lazy='raise'), каждый роут
+# явно указывает, какие связи ему нужны. Карточка задачи отдается
+# с исполнителем, родительской и дочерними задачами
+TASK_DETAIL_OPTIONS = (joinedload(Task.employees),
+                       joinedload(Task.parent_task),
+                       selectinload(Task.child_task))
+
+
+async def load_task_detail(db: AsyncSession, task_id: UUID) -> Task | None:
+    """
+    Загрузка задачи со связями для карточки задачи
+
+    Attributes:
+    -----------
+        db: AsyncSession    сессия базы данных
+        task_id: UUID   ID задачи
+
+    :return: Task | None    задача или None, если она не найдена
+    """
+    result = await db.execute(
+        select(Task).options(*TASK_DETAIL_OPTIONS).filter(Task.id == task_id).
+        execution_options(populate_existing=True))
+    return result.unique().scalars().first()
+
+
+async def update_task_returning(db: AsyncSession, task_id: UUID,
+                                values: dict):
+    """
+    Обновление задачи одним UPDATE ... RETURNING
+
+    Кроме новых значений колонок возвращаются прежние исполнитель
+    и статус (old_employee_id, old_status) для пересчета загруженности.
+    В PostgreSQL они читаются в том же запросе (UPDATE ... FROM подзапроса
+    с блокировкой строки), в остальных СУБД - отдельным SELECT перед
+    обновлением.
+
+    Attributes:
+    -----------
+        db: AsyncSession    сессия базы данных
+        task_id: UUID   ID задачи
+        values: dict    новые значения колонок
+
+    :return: Row | None строка задачи или None, если задача не найдена
+    """
+    if db.get_bind().dialect.name == 'postgresql':
+        old = (select(Task.id, Task.employee_id, Task.status).
+               filter(Task.id == task_id).
+               with_for_update().subquery('old'))
+        query = (update(Task).filter(Task.id == old.c.id).values(values).
+                 returning(*Task.__table__.c,
+                           old.c.employee_id.label('old_employee_id'),
+                           old.c.status.label('old_status')))
+    else:
+        result = await db.execute(
+            select(Task.employee_id, Task.status).filter(Task.id == task_id))
+        old = result.first()
+        old_employee_id, old_status = old if old else (None, None)
+        query = (update(Task).filter(Task.id == task_id).values(values).
+                 returning(*Task.__table__.c,
+                           literal(old_employee_id, Task.employee_id.type).
+                           label('old_employee_id'),
+                           literal(old_status, Task.status.type).
+                           label('old_status')))
+    result = await db.execute(
+        query.execution_options(synchronize_session=False))
+    return result.first()
+
+
+def task_cache_tags(task: Task) -> list[str]:
+    """
+    Теги кэша карточки задачи: сущности, данные которых вошли в ответ
+
+    Attributes:
+    -----------
+        task: Task  задача с загруженными связями
+
+    :return: list[str]  ключи исполнителя, родительской и дочерних задач
+    """
+    tags = [task_key(child.id) for child in task.child_task]
+    if task.employee_id is not None:
+        tags.append(employee_key(task.employee_id))
+    if task.parent_id is not None:
+        tags.append(task_key(task.parent_id))
+    return tags
+
+
+def invalidate_tasks(task_ids=(), parent_ids=(), employee_ids=()) -> None:
+    """
+    Сброс кэша после изменения задач
+
+    Карточки, в которые входят измененные задачи, помечены их ключами.
+    Новые родительские задачи и исполнители передаются отдельно: в их
+    кэшированных карточках измененных задач еще нет.
+
+    Attributes:
+    -----------
+        task_ids: Iterable[UUID]    ID измененных задач
+        parent_ids: Iterable[UUID]  ID новых родительских задач
+        employee_ids: Iterable[UUID]    ID новых исполнителей
+    """
+    response_cache.invalidate(
+        *(task_key(task_id) for task_id in task_ids),
+        *(task_key(parent_id) for parent_id in parent_ids
+          if parent_id is not None),
+        *(employee_key(employee_id) for employee_id in employee_ids
+          if employee_id is not None))
+
+
+async def task_response(db: AsyncSession, task,
+                        with_relations: bool) -> ORJSONResponse:
+    """
+    Ответ с обновленной задачей
+
+    Attributes:
+    -----------
+        db: AsyncSession    сессия базы данных
+        task: Row   строка задачи из UPDATE ... RETURNING
+        with_relations: bool    загрузить связи задачи для карточки
+
+    :return: ORJSONResponse словарь с информацией о задаче
+    """
+    if not with_relations:
+        return ORJSONResponse(
+            {"status": "success",
+             "task": {column.name: task._mapping[column.name]
+                      for column in Task.__table__.c}})
+    task = await load_task_detail(db, task.id)
+    return ORJSONResponse({"status": "success",
+                           "task": to_json(TASK_DETAIL, task)})
+
+
+def initial_status(employee_id: UUID | None, task_status: int) -> int:
+    """
+    Статус новой задачи: задача с исполнителем сразу считается взятой в работу
+
+    Attributes:
+    -----------
+        employee_id: UUID | None    ID исполнителя
+        task_status: int    переданный статус задачи
+
+    :return: int    статус, с которым задача сохраняется
+    """
+    if employee_id is not None and task_status == 0:
+        return 1
+    return task_status
+
+
+def filter_important_tasks(query: Select, parent: AliasedClass) -> Select:
+    """
+    Отбор важных задач: задача не взята в работу, а родительская - взята.
+
+    Attributes:
+    -----------
+        query: Select   запрос к задачам
+        parent: AliasedClass    псевдоним таблицы задач для родительской задачи
+
+    :return: Select запрос с соединением с родительской задачей и фильтром
+    """
+    return (query.join(parent, Task.parent_id == parent.id).
+            filter(Task.status == 0, parent.status == 1))
+
 
 @api_task.get('/', response_model=TasksList)
-def get_tasks(db: Session = Depends(get_db),
-              limit: int = 10, page: int = 1) -> dict:
+async def get_tasks(request: Request, db: AsyncSession = Depends(get_db),
+                    limit: int = 10, page: int = 1,
+                    cursor: str | None = None):
     """
     Функция для получения списка задач с возможностью пагинации
 
     Attributes:
     -----------
-        db: Session Cессия базы данных
+        request: Request    запрос (для проверки If-None-Match)
+        db: AsyncSession Cессия базы данных
         limit: int Количество задач на страницу
-        page: int Номер страницы
+        page: int Номер страницы (если не передан cursor)
+        cursor: str Курсор следующей страницы из next_cursor
+
+    :return: ORJSONResponse Словарь с результатами запроса (304, если совпал ETag)
+    """
+    etag = await list_etag(db, request, Task.__tablename__)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    tasks = await keyset_paginate(
+        db, select(*Task.__table__.c), Task.period_of_execution, Task.id,
+        limit, cursor, page)
+    return ORJSONResponse(
+        {'tasks': tasks,
+         'next_cursor': next_cursor(tasks, limit, 'period_of_execution')},
+        headers={'ETag': etag})
+
+
+@api_task.get('/export')
+async def export_tasks(
+        format: str = 'ndjson',
+        session_factory: async_sessionmaker = Depends(get_sessionmaker)):
+    """
+    Функция для потоковой выгрузки всех задач в NDJSON или CSV
+
+    Attributes:
+    -----------
+        format: str формат выгрузки: ndjson или csv
+        session_factory: async_sessionmaker фабрика сессий базы данных
+
+    :return: StreamingResponse  потоковый ответ с задачами
+    """
+    return export_response(session_factory,
+                           select(*Task.__table__.c).order_by(Task.id),
+                           format, 'tasks')
+
+
+@api_task.get('/search')
+async def search_tasks(request: Request,
+                       q: str = Query(..., min_length=1, max_length=256),
+                       limit: int = Query(10, ge=1, le=100),
+                       page: int = Query(1, ge=1),
+                       db: AsyncSession = Depends(get_db)):
+    """
+    Функция для полнотекстового поиска задач по названию и содержанию
 
-    :return: dict Словарь с результатами запроса
+    Attributes:
+    -----------
+        request: Request    запрос (для проверки If-None-Match)
+        q: str  строка поиска
+        limit: int  количество задач на страницу
+        page: int   номер страницы
+        db: AsyncSession    сессия базы данных
+
+    :return: ORJSONResponse задачи по убыванию релевантности (rank)
+        с фрагментом текста, где найденные слова выделены (snippet)
     """
-    skip = (page - 1) * limit
-    tasks = db.query(Task).limit(limit).offset(skip).all()
-    return {'status': 'success', 'results': len(tasks), 'tasks': tasks}
+    etag = await list_etag(db, request, Task.__tablename__)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    query = search_query(db.get_bind().dialect.name, q, limit, page)
+    tasks = (await db.execute(query)).all() if query is not None else []
+    return ORJSONResponse({'status': 'success', 'results': len(tasks),
+                           'page': page, 'tasks': tasks},
+                          headers={'ETag': etag})
 
 
 @api_task.get('/get/{taskId}')
-def get_task(taskId: str, db: Session = Depends(get_db)):
+async def get_task(taskId: UUID, db: AsyncSession = Depends(get_db)):
     """
     Функция для получения задачи по её ID
 
     Attributes:
     -----------
-        taskId: str ID задачи
-        db: Session сессия базы данных
+        taskId: UUID ID задачи
+        db: AsyncSession сессия базы данных
 
-    :return: dict   словарь с информацией о задаче
+    :return: Response   словарь с информацией о задаче (из кэша, если есть)
     """
-    task = db.query(Task).filter(Task.id == taskId).first()
-    if not task:
+    key = task_key(taskId)
+    body = response_cache.get(key)
+    if body is None:
+        version = response_cache.version()
+        task = await load_task_detail(db, taskId)
+        if not task:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f'Задание с id: {taskId} не найдено')
+        body = dumps({"status": "success",
+                      "task": to_json(TASK_DETAIL, task)})
+        response_cache.set(key, body, task_cache_tags(task), version)
+    return cached_response(body)
+
+
+@api_task.get('/{taskId}/subtree')
+async def get_task_subtree(taskId: UUID,
+                           max_depth: int | None = Query(None, ge=0),
+                           include_tasks: bool = True,
+                           db: AsyncSession = Depends(get_db)):
+    """
+    Функция для получения поддерева задачи одним рекурсивным запросом
+
+    Attributes:
+    -----------
+        taskId: UUID    ID корневой задачи
+        max_depth: int  максимальная глубина потомков (по умолчанию - все)
+        include_tasks: bool вернуть задачи поддерева, а не только сводку
+        db: AsyncSession    сессия базы данных
+
+    :return: dict   задачи поддерева с глубиной и сводка по статусам
+    """
+    tree = subtree_cte(taskId, max_depth)
+    if include_tasks:
+        result = await db.execute(tree_nodes_query(tree))
+        tasks = result.mappings().all()
+        statuses = {}
+        for task in tasks:
+            statuses[task['status']] = statuses.get(task['status'], 0) + 1
+    else:
+        result = await db.execute(tree_rollup_query(tree))
+        statuses = dict(result.all())
+        tasks = None
+
+    if not statuses:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f'Задание с id: {taskId} не найдено')
-    return {"status": "success", "task": task}
+    response = {'status': 'success', 'rollup': status_rollup(statuses)}
+    if tasks is not None:
+        response['results'] = len(tasks)
+        response['tasks'] = tasks
+    return ORJSONResponse(response)
+
+
+@api_task.get('/{taskId}/ancestors')
+async def get_task_ancestors(taskId: UUID,
+                             max_depth: int | None = Query(None, ge=1),
+                             db: AsyncSession = Depends(get_db)):
+    """
+    Функция для получения цепочки родительских задач одним рекурсивным запросом
+
+    Attributes:
+    -----------
+        taskId: UUID    ID задачи
+        max_depth: int  сколько уровней вверх подниматься (по умолчанию - до корня)
+        db: AsyncSession    сессия базы данных
+
+    :return: dict   родительские задачи, начиная с непосредственного родителя
+    """
+    result = await db.execute(
+        tree_nodes_query(ancestors_cte(taskId, max_depth)))
+    tasks = result.mappings().all()
+    if not tasks:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f'Задание с id: {taskId} не найдено')
+    ancestors = tasks[1:]
+    return ORJSONResponse({'status': 'success', 'results': len(ancestors),
+                           'tasks': ancestors})
 
 
 @api_task.post('/create/', status_code=status.HTTP_201_CREATED)
-def create_tasks(payload: TaskCreateUpdateSchema = Body(),
-                 db: Session = Depends(get_db)):
+async def create_tasks(payload: TaskCreateUpdateSchema = Body(),
+                       db: AsyncSession = Depends(get_db)):
     """
     Функция для создания новой задачи на основе переданных данных
 
     Attributes:
     -----------
         payload: TaskCreateUpdateSchema данные для создания задачи
-        db: Session сессия базы данных
+        db: AsyncSession сессия базы данных
 
     :return: dict словарь с информацией о созданной задаче
     """
     new_task = Task(**payload.dict())
-    if new_task.employee_id is not None and new_task.status == 0:
-        new_task.status = 1
+    new_task.status = initial_status(new_task.employee_id, new_task.status)
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
-    return {'status': 'success',
-            'task': new_task}
+    await db.flush()
+    await emit(db, 'task.created', {new_task.id: [new_task.employee_id]})
+    await bump_versions(db, Task.__tablename__)
+    await db.commit()
+    invalidate_tasks(parent_ids=[new_task.parent_id],
+                     employee_ids=[new_task.employee_id])
+    workload_index.adjust(new_task.employee_id, task_load(new_task.status))
+    new_task = await load_task_detail(db, new_task.id)
+    return ORJSONResponse({'status': 'success',
+                           'task': to_json(TASK_DETAIL, new_task)},
+                          status_code=status.HTTP_201_CREATED)
+
+
+@api_task.post('/bulk', status_code=status.HTTP_201_CREATED)
+async def create_tasks_bulk(request: Request,
+                            db: AsyncSession = Depends(get_db)):
+    """
+    Функция для массового создания задач (JSON-массив или NDJSON)
+
+    Каждая строка проверяется схемой TaskCreateUpdateSchema, строки
+    вставляются пачками многострочным INSERT ... RETURNING с фиксацией
+    каждой пачки. Строки с ошибками валидации, несуществующими
+    сотрудником или родительской задачей, а также с неуникальным
+    названием пропускаются и возвращаются в errors.
+
+    Attributes:
+    -----------
+        request: Request    запрос с массивом задач в теле
+        db: AsyncSession    сессия базы данных
+
+    :return: dict   количество созданных задач и ошибки по строкам
+    """
+    errors = []
+    created = 0
+    async for chunk in iter_valid_chunks(request, TaskCreateUpdateSchema,
+                                         errors):
+        employee_ids = {item.employee_id for _, item in chunk} - {None}
+        parent_ids = {item.parent_id for _, item in chunk} - {None}
+        if employee_ids:
+            result = await db.execute(
+                select(Employee.id).filter(Employee.id.in_(employee_ids)))
+            employee_ids = set(result.scalars().all())
+        if parent_ids:
+            result = await db.execute(
+                select(Task.id).filter(Task.id.in_(parent_ids)))
+            parent_ids = set(result.scalars().all())
+
+        rows = {}
+        for index, item in chunk:
+            if item.employee_id is not None and item.employee_id not in employee_ids:
+                errors.append({'index': index,
+                               'detail': f'Сотрудник с id: {item.employee_id} не найден'})
+                continue
+            if item.parent_id is not None and item.parent_id not in parent_ids:
+                errors.append({'index': index,
+                               'detail': f'Задание с id: {item.parent_id} не найдено'})
+                continue
+            row = item.dict()
+            row['id'] = uuid.uuid4()
+            row['status'] = initial_status(row['employee_id'], row['status'])
+            rows[index] = row
+
+        inserted = await insert_ignore_conflicts(db, Task, list(rows.values()))
+        await emit(db, 'task.created',
+                   {row['id']: [row['employee_id']] for row in rows.values()
+                    if row['id'] in inserted})
+        await bump_versions(db, Task.__tablename__)
+        await db.commit()
+        invalidate_tasks(
+            parent_ids={row['parent_id'] for row in rows.values()
+                        if row['id'] in inserted},
+            employee_ids={row['employee_id'] for row in rows.values()
+                          if row['id'] in inserted})
+        created += len(inserted)
+        for index, row in rows.items():
+            if row['id'] in inserted:
+                workload_index.adjust(row['employee_id'],
+                                      task_load(row['status']))
+            else:
+                errors.append({'index': index,
+                               'detail': f"Задание с названием {row['name']} уже существует"})
+
+    errors.sort(key=lambda error: error['index'])
+    return {'status': 'success', 'results': created, 'errors': errors}
 
 
 @api_task.patch('/update/{taskId}')
-def update_task(taskId: str, payload: TaskCreateUpdateSchema = Depends(),
-                db: Session = Depends(get_db)):
+async def update_task(taskId: UUID,
+                      payload: TaskCreateUpdateSchema = Depends(),
+                      with_relations: bool = True,
+                      db: AsyncSession = Depends(get_db)):
     """
     Функция для обновления задачи по её ID
 
     Attributes:
     -----------
-        taskId: str     ID задачи для обновления
+        taskId: UUID     ID задачи для обновления
         payload: TaskCreateUpdateSchema     данные для обновления задачи
-        db: Session     сессия базы данных
+        with_relations: bool    вернуть задачу вместе со связями (отдельный
+                                SELECT); иначе ответ строится из RETURNING
+        db: AsyncSession     сессия базы данных
 
     :return: dict   словарь с информацией об обновленной задаче
     """
-    task_query = db.query(Task).filter(Task.id == taskId)
-    task = task_query.first()
-
-    if not task:
+    update_data = payload.dict(exclude_unset=True)
+    task = await update_task_returning(db, taskId, update_data)
+    if task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f'Задание с id: {taskId} не найдено')
-    update_data = payload.dict(exclude_unset=True)
-    task_query.filter(Task.id == taskId).update(
-        update_data, synchronize_session=False)
-    db.commit()
-    db.refresh(task)
-    return {"status": "success", "task": task}
+    await emit(db, 'task.updated',
+               {task.id: [task.employee_id, task.old_employee_id]})
+    await bump_versions(db, Task.__tablename__)
+    await db.commit()
+    invalidate_tasks([task.id], [task.parent_id], [task.employee_id])
+    if (task.employee_id != task.old_employee_id or
+            task.status != task.old_status):
+        workload_index.adjust(task.old_employee_id,
+                              -task_load(task.old_status))
+        workload_index.adjust(task.employee_id, task_load(task.status))
+    return await task_response(db, task, with_relations)
 
 
 @api_task.delete('/del/{taskId}')
-def delete_task(taskId: str, db: Session = Depends(get_db)):
+async def delete_task(taskId: UUID, db: AsyncSession = Depends(get_db)):
     """
     Функция для удаления задачи по её ID
 
     Attributes:
     -----------
-        taskId: str     ID задачи для удаления
-        db: Session     сессия базы данных
+        taskId: UUID     ID задачи для удаления
+        db: AsyncSession     сессия базы данных
 
     :return: Response   статус 204 при успешном удалении
     """
-    task_query = db.query(Task).filter(Task.id == taskId)
-    task = task_query.first()
-    if not task:
+    result = await db.execute(
+        select(Task.employee_id, Task.status).filter(Task.id == taskId))
+    row = result.first()
+    if row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f'Задание с id: {taskId} не найдено')
-    task_query.delete(synchronize_session=False)
-    db.commit()
+    await db.execute(
+        delete(Task).filter(Task.id == taskId).
+        execution_options(synchronize_session=False))
+    await emit(db, 'task.deleted', {taskId: [row.employee_id]})
+    await bump_versions(db, Task.__tablename__)
+    await db.commit()
+    invalidate_tasks([taskId])
+    workload_index.adjust(row.employee_id, -task_load(row.status))
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @api_task.get('/important')
-def get_important_tasks(db: Session = Depends(get_db),
-                        limit: int = 10, page: int = 1):
+async def get_important_tasks(db: AsyncSession = Depends(get_db),
+                              limit: int = 10, page: int = 1,
+                              cursor: str | None = None):
     """
     Функция для получения списка важных задач с учетом родительских задач
 
     Attributes:
     -----------
-        db: Session сессия базы данных
+        db: AsyncSession сессия базы данных
         limit: int количество задач на страницу
-        page: int номер страницы
+        page: int номер страницы (если не передан cursor)
+        cursor: str курсор следующей страницы из next_cursor
 
     :return: dict словарь с результатами запроса
     """
-    skip = (page - 1) * limit
-    tasks = (db.query(Task).filter(Task.status == 0).
-             limit(limit).offset(skip).all())
-    tasks_ret = []
-    for task in tasks:
-        if task.parent_id is not None and task.parent_task.status == 1:
-            tasks_ret.append(task)
+    parent = aliased(Task)
+    query = filter_important_tasks(
+        select(Task).options(contains_eager(Task.parent_task.of_type(parent))),
+        parent)
+    tasks = await keyset_paginate(
+        db, query, Task.period_of_execution, Task.id, limit, cursor, page,
+        entities=True)
 
-    return {'status': 'success', 'results': len(tasks_ret), 'tasks': tasks_ret}
+    return ORJSONResponse(
+        {'status': 'success', 'results': len(tasks),
+         'tasks': to_json(TASKS_WITH_PARENT, tasks),
+         'next_cursor': next_cursor(tasks, limit, 'period_of_execution')})
 
 
 @api_task.get('/free')
-def get_free_tasks(db: Session = Depends(get_db),
-                   limit: int = 10, page: int = 1):
+async def get_free_tasks(db: AsyncSession = Depends(get_db),
+                         limit: int = 10, page: int = 1,
+                         cursor: str | None = None):
     """
     Функция для получения списка незадействованных задач (статус задачи = 0)
 
     Attributes:
     -----------
-        db: Session сессия базы данных
+        db: AsyncSession сессия базы данных
         limit: int  количество задач на страницу
-        page: int   номер страницы
+        page: int   номер страницы (если не передан cursor)
+        cursor: str курсор следующей страницы из next_cursor
 
     :return: dict
         словарь с результатами запроса
     """
-    skip = (page - 1) * limit
-    tasks = (db.query(Task).filter(Task.status == 0).
-             limit(limit).offset(skip).all())
+    tasks = await keyset_paginate(
+        db, select(*Task.__table__.c).filter(Task.status == 0),
+        Task.period_of_execution, Task.id, limit, cursor, page)
 
-    return {'status': 'success', 'results': len(tasks), 'tasks': tasks}
+    return ORJSONResponse(
+        {'status': 'success', 'results': len(tasks), 'tasks': tasks,
+         'next_cursor': next_cursor(tasks, limit, 'period_of_execution')})
 
 
-@api_task.patch('/set_employee/{taskId}')
-def set_employee_important_task(taskId: str, db: Session = Depends(get_db)):
+def filter_due_tasks(query: Select, before: datetime | None,
+                     after: datetime | None, overdue: bool | None,
+                     employee_id: UUID | None) -> Select:
     """
-    Функция для установки исполнителя для важной задачи
+    Отбор незавершенных задач со сроком выполнения в заданном окне
 
     Attributes:
     -----------
-        taskId: str  ID задачи
-        db: Session сессия базы данных
+        query: Select   запрос к задачам
+        before: datetime    срок раньше указанного момента
+        after: datetime срок не раньше указанного момента
+        overdue: bool   True - только просроченные, False - только не просроченные
+        employee_id: UUID   ID исполнителя
 
-    :return: dict   словарь с информацией об обновленной задаче
+    :return: Select запрос с фильтрами
+    """
+    query = query.filter(Task.status.in_(OPEN_STATUSES),
+                         Task.period_of_execution.is_not(None))
+    if before is not None:
+        query = query.filter(Task.period_of_execution < before)
+    if after is not None:
+        query = query.filter(Task.period_of_execution >= after)
+    if overdue is not None:
+        now = datetime.now(timezone.utc)
+        query = query.filter(Task.period_of_execution < now if overdue
+                             else Task.period_of_execution >= now)
+    if employee_id is not None:
+        query = query.filter(Task.employee_id == employee_id)
+    return query
+
+
+@api_task.get('/due')
+async def get_due_tasks(request: Request,
+                        before: datetime | None = None,
+                        after: datetime | None = None,
+                        overdue: bool | None = None,
+                        employee_id: UUID | None = None,
+                        counts_only: bool = False,
+                        limit: int = Query(10, ge=1),
+                        page: int = 1,
+                        cursor: str | None = None,
+                        db: AsyncSession = Depends(get_db)):
     """
-    task_query = db.query(Task).filter(Task.id == taskId)
-    task = task_query.first()
+    Функция для получения незавершенных задач по сроку выполнения
+    (просроченные, со сроком в заданном окне)
 
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f'Задание с id: {taskId} не найдено')
+    Attributes:
+    -----------
+        request: Request    запрос (для проверки If-None-Match)
+        before: datetime    срок раньше указанного момента
+        after: datetime срок не раньше указанного момента
+        overdue: bool   True - только просроченные, False - только не просроченные
+        employee_id: UUID   ID исполнителя
+        counts_only: bool   вернуть только количество задач по статусам
+        limit: int  количество задач на страницу
+        page: int   номер страницы (если не передан cursor)
+        cursor: str курсор следующей страницы из next_cursor
+        db: AsyncSession    сессия базы данных
+
+    :return: ORJSONResponse задачи по возрастанию срока или их количество
+    """
+    # Результат с overdue зависит от текущего времени, а не только
+    # от данных, поэтому для него ETag не выдается
+    headers = None
+    if overdue is None:
+        etag = await list_etag(db, request, Task.__tablename__)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        headers = {'ETag': etag}
+
+    if counts_only:
+        result = await db.execute(filter_due_tasks(
+            select(Task.status, func.count()), before, after, overdue,
+            employee_id).group_by(Task.status))
+        return ORJSONResponse({'status': 'success',
+                               'rollup': status_rollup(dict(result.all()))},
+                              headers=headers)
+
+    tasks = await keyset_paginate(
+        db, filter_due_tasks(select(*Task.__table__.c), before, after,
+                             overdue, employee_id),
+        Task.period_of_execution, Task.id, limit, cursor, page)
+    return ORJSONResponse(
+        {'status': 'success', 'results': len(tasks), 'tasks': tasks,
+         'next_cursor': next_cursor(tasks, limit, 'period_of_execution')},
+        headers=headers)
+
+
+@api_task.patch('/set_employee/batch')
+async def set_employee_important_tasks_batch(
+        payload: TaskBatchAssignSchema = Body(),
+        db: AsyncSession = Depends(get_db)):
+    """
+    Функция для пакетного назначения исполнителей важным задачам
+
+    Исполнители выбираются по тем же правилам, что и в
+    set_employee_important_task, но по счетчикам загруженности,
+    прочитанным один раз в начале запроса. Все назначения записываются
+    одним пакетным UPDATE в одной транзакции.
 
-    employee_parent = task.parent_task
+    Attributes:
+    -----------
+        payload: TaskBatchAssignSchema  список ID задач или all_important
+        db: AsyncSession сессия базы данных
 
-    parent_task_count = employee_parent.count_task() if employee_parent else 0
+    :return: dict   словарь с назначениями и ненайденными задачами
+    """
+    parent = aliased(Task)
+    query = select(Task.id, Task.employee_id, Task.status,
+                   parent.employee_id.label('parent_employee_id'))
+
+    if payload.all_important:
+        result = await db.execute(
+            filter_important_tasks(query, parent).order_by(Task.id))
+        rows = result.all()
+        not_found = []
+    else:
+        query = (query.outerjoin(parent, Task.parent_id == parent.id).
+                 order_by(Task.id))
+        task_ids = list(dict.fromkeys(payload.task_ids))
+        rows = []
+        for i in range(0, len(task_ids), ID_CHUNK_SIZE):
+            chunk = task_ids[i:i + ID_CHUNK_SIZE]
+            result = await db.execute(query.filter(Task.id.in_(chunk)))
+            rows.extend(result.all())
+        found = {row.id for row in rows}
+        not_found = [task_id for task_id in task_ids if task_id not in found]
+
+    tally = WorkloadIndex()
+    await tally.warm_up(db)
+    assignments = []
+    for row in rows:
+        employee_id = tally.choose_employee(row.parent_employee_id)
+        if employee_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail='Сотрудники для назначения не найдены')
+        tally.adjust(row.employee_id, -task_load(row.status))
+        tally.adjust(employee_id, 1)
+        assignments.append({'id': row.id,
+                            'employee_id': employee_id,
+                            'status': 1})
+
+    if assignments:
+        await db.execute(update(Task), assignments)
+        await emit(db, 'task.assigned',
+                   {row.id: [row.employee_id, assignment['employee_id']]
+                    for row, assignment in zip(rows, assignments)})
+        await bump_versions(db, Task.__tablename__)
+        await db.commit()
+        invalidate_tasks(
+            [assignment['id'] for assignment in assignments],
+            employee_ids={assignment['employee_id']
+                          for assignment in assignments})
+        for row, assignment in zip(rows, assignments):
+            workload_index.adjust(row.employee_id, -task_load(row.status))
+            workload_index.adjust(assignment['employee_id'], 1)
 
-    payload = TaskCreateUpdateSchema(
-        name=task.name,
-        content=task.content,
-        period_of_execution=task.period_of_execution,
-        parent_id=task.parent_id,
-        status=task.status,
-        employee_id=task.employee_id
-    )
+    return {'status': 'success',
+            'results': len(assignments),
+            'assignments': [{'task_id': assignment['id'],
+                             'employee_id': assignment['employee_id']}
+                            for assignment in assignments],
+            'not_found': not_found}
 
-    employees_query = db.query(Employee).all()
-    employees_query = sorted(employees_query, key=count_tasks)
-    employee_min = employees_query[0]
 
-    employees_free = [
-        employee for employee in employees_query if employee.count_task() == 0]
-    employee_free = employee_min
+@api_task.patch('/set_employee/{taskId}')
+async def set_employee_important_task(taskId: UUID,
+                                      with_relations: bool = True,
+                                      db: AsyncSession = Depends(get_db)):
+    """
+    Функция для установки исполнителя для важной задачи
 
-    if employees_free:
-        employee_free = employees_free[0]
-    else:
-        if employee_parent and parent_task_count < employee_min.count_task() + 3:
-            employee_free = employee_parent
+    Attributes:
+    -----------
+        taskId: UUID  ID задачи
+        with_relations: bool    вернуть задачу вместе со связями
+        db: AsyncSession сессия базы данных
 
-    payload.employee_id = employee_free.id
-    payload.status = 1
-    update_data = payload.dict(exclude_unset=True)
+    :return: dict   словарь с информацией об обновленной задаче
+    """
+    parent = aliased(Task)
+    result = await db.execute(
+        select(Task.employee_id, Task.status,
+               parent.employee_id.label('parent_employee_id')).
+        outerjoin(parent, Task.parent_id == parent.id).
+        filter(Task.id == taskId))
+    task = result.first()
 
-    task_query.update(update_data, synchronize_session=False)
-    db.commit()
-    db.refresh(task)
+    if not task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f'Задание с id: {taskId} не найдено')
 
-    return {"status": "success", "task": task}
+    parent_employee_id = task.parent_employee_id
+
+    await workload_index.ensure_fresh(db)
+    old_employee_id = task.employee_id
+    old_load = task_load(task.status)
+    while True:
+        employee_id = workload_index.choose_employee(parent_employee_id)
+        if employee_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail='Сотрудники для назначения не найдены')
+        # Счетчики меняются сразу после выбора (до первого await), чтобы
+        # параллельные запросы не выбрали того же сотрудника; при ошибке
+        # изменения откатываются
+        workload_index.adjust(old_employee_id, -old_load)
+        workload_index.adjust(employee_id, 1)
+        try:
+            # Сотрудник, задачи которого передаются другим, задачу
+            # не получает, даже если индекс об этом еще не знает
+            result = await db.execute(
+                update(Task).
+                filter(Task.id == taskId, ~is_draining(employee_id)).
+                values(employee_id=employee_id, status=1).
+                returning(*Task.__table__.c).
+                execution_options(synchronize_session=False))
+            task = result.first()
+            if task is not None:
+                await emit(db, 'task.assigned',
+                           {taskId: [old_employee_id, employee_id]})
+                await bump_versions(db, Task.__tablename__)
+                await db.commit()
+                break
+            found = await db.scalar(select(exists().where(Task.id == taskId)))
+        except Exception:
+            workload_index.adjust(employee_id, -1)
+            workload_index.adjust(old_employee_id, old_load)
+            raise
+        workload_index.adjust(employee_id, -1)
+        workload_index.adjust(old_employee_id, old_load)
+        if not found:
+            # Задачу удалили между чтением и обновлением
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f'Задание с id: {taskId} не найдено')
+        # Задание на передачу задач сотрудника создано другим воркером
+        # после прогрева индекса: выбирается другой исполнитель
+        workload_index.exclude_employee(employee_id)
+    invalidate_tasks([taskId], employee_ids=[employee_id])
+
+    return await task_response(db, task, with_relations)
@@ -0,0 +1,177 @@
+import heapq
+import time
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.employee.model import Employee, is_draining
+from src.tasks.model import OPEN_STATUSES
+
+# На сколько задач исполнитель родительской задачи может быть загружен
+# больше наименее загруженного сотрудника, чтобы получить дочернюю задачу
+PARENT_EMPLOYEE_MARGIN = 3
+
+
+def task_load(task_status: int | None) -> int:
+    """Вклад задачи в загруженность: учитываются только незавершенные."""
+    return 1 if task_status in OPEN_STATUSES else 0
+
+
+class WorkloadIndex:
+    """
+    Индекс загруженности сотрудников: сотрудник -> количество
+    незавершенных задач.
+
+    Хранит минимальную кучу (количество задач, id сотрудника) с ленивым
+    удалением устаревших записей, поэтому поиск наименее загруженного
+    сотрудника и изменение счетчика выполняются за O(log E).
+    Индекс прогревается одним запросом к счетчикам и поддерживается
+    сервисами при создании, изменении и удалении задач. Так как индекс
+    живет в памяти процесса, он периодически перечитывается из БД,
+    чтобы учесть изменения, сделанные другими воркерами.
+
+    Attributes:
+    -----------
+    refresh_interval : float    Время жизни индекса в секундах.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._counts: dict[UUID, int] = {}
+        self._heap: list[tuple[int, UUID]] = []
+        # Сотрудники, задачи которых передаются другим (см. is_draining)
+        self._excluded: set[UUID] = set()
+        self._loaded_at: float | None = None
+
+    def is_stale(self) -> bool:
+        """Проверка, нужно ли перечитать индекс из БД."""
+        return (self._loaded_at is None or
+                time.monotonic() - self._loaded_at > self.refresh_interval)
+
+    def reset(self) -> None:
+        """Сброс индекса; он будет прогрет при следующем обращении."""
+        self._counts.clear()
+        self._heap.clear()
+        self._excluded.clear()
+        self._loaded_at = None
+
+    async def warm_up(self, db: AsyncSession) -> None:
+        """
+        Загрузка количества задач всех сотрудников одним запросом
+        (из счетчиков active_task_count, без чтения таблицы задач).
+        Сотрудники, задачи которых передаются другим, в индекс не попадают.
+
+        Attributes:
+        -----------
+        db : AsyncSession   Сессия базы данных.
+        """
+        result = await db.execute(
+            select(Employee.id, Employee.active_task_count,
+                   is_draining(Employee.id).label('draining')))
+        rows = result.all()
+        self._counts = {row.id: row.active_task_count
+                        for row in rows if not row.draining}
+        self._excluded = {row.id for row in rows if row.draining}
+        self._heap = [(count, employee_id)
+                      for employee_id, count in self._counts.items()]
+        heapq.heapify(self._heap)
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Прогрев индекса, если он еще не загружен или устарел."""
+        if self.is_stale():
+            await self.warm_up(db)
+
+    def _set(self, employee_id: UUID, count: int) -> None:
+        self._counts[employee_id] = count
+        heapq.heappush(self._heap, (count, employee_id))
+        # Устаревшие записи копятся в куче, периодически пересобираем ее
+        if len(self._heap) > 2 * len(self._counts) + 64:
+            self._heap = [(c, e) for e, c in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def add_employee(self, employee_id: UUID) -> None:
+        """Добавление нового сотрудника без задач."""
+        if self._loaded_at is not None:
+            self._set(employee_id, 0)
+
+    def remove_employee(self, employee_id: UUID) -> None:
+        """Удаление сотрудника из индекса."""
+        self._counts.pop(employee_id, None)
+
+    def exclude_employee(self, employee_id: UUID) -> None:
+        """Исключение сотрудника из выбора исполнителей до прогрева."""
+        self._counts.pop(employee_id, None)
+        self._excluded.add(employee_id)
+
+    def adjust(self, employee_id: UUID | None, delta: int) -> None:
+        """
+        Изменение количества задач сотрудника.
+
+        Attributes:
+        -----------
+        employee_id : UUID | None   Идентификатор сотрудника.
+        delta : int     Изменение количества задач.
+        """
+        if (employee_id is None or self._loaded_at is None or
+                employee_id in self._excluded):
+            return
+        if employee_id not in self._counts:
+            # Сотрудник создан другим воркером: точное значение придет
+            # при следующем прогреве
+            self._loaded_at = None
+            return
+        self._set(employee_id, max(self._counts[employee_id] + delta, 0))
+
+    def count(self, employee_id: UUID) -> int | None:
+        """Количество задач сотрудника или None, если он неизвестен."""
+        return self._counts.get(employee_id)
+
+    def least_loaded(self) -> tuple[UUID, int] | None:
+        """
+        Наименее загруженный сотрудник.
+
+        Returns:
+        --------
+        tuple[UUID, int] | None     Идентификатор сотрудника и количество задач.
+        """
+        while self._heap:
+            count, employee_id = self._heap[0]
+            if self._counts.get(employee_id) == count:
+                return employee_id, count
+            heapq.heappop(self._heap)
+        return None
+
+    def choose_employee(self,
+                        parent_employee_id: UUID | None) -> UUID | None:
+        """
+        Выбор исполнителя для важной задачи.
+
+        Свободный сотрудник получает задачу в первую очередь. Если свободных
+        нет, задача достается исполнителю родительской задачи, когда он
+        загружен меньше, чем наименее загруженный сотрудник + 3 задачи,
+        иначе - наименее загруженному сотруднику.
+
+        Attributes:
+        -----------
+        parent_employee_id : UUID | None    Исполнитель родительской задачи.
+
+        Returns:
+        --------
+        UUID | None     Идентификатор выбранного сотрудника.
+        """
+        least = self.least_loaded()
+        if least is None:
+            return None
+        employee_min, min_count = least
+        if min_count == 0 or parent_employee_id is None:
+            return employee_min
+        parent_count = self.count(parent_employee_id)
+        if (parent_count is not None and
+                parent_count < min_count + PARENT_EMPLOYEE_MARGIN):
+            return parent_employee_id
+        return employee_min
+
+
+workload_index = WorkloadIndex()
@@ -0,0 +1,185 @@
+import hashlib
+import os
+from collections import Counter
+
+from fastapi import Request, Response, status
+from sqlalchemy import (Column, Insert, Integer, String, delete, event, func,
+                        insert, select, update)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.employee.model import Base
+
+# Таблицы, для которых ведется версия (совпадают с __tablename__ моделей)
+VERSIONED_TABLES = ('employee', 'task')
+# Как часто записи изменений сворачиваются в версию таблицы
+VERSION_COMPACT_EVERY = int(os.getenv('VERSION_COMPACT_EVERY', 64))
+
+
+class TableVersion(Base):
+    """
+    Версия данных таблицы для условных GET-запросов (ETag).
+
+    Версия таблицы - это version плюс количество еще не свернутых
+    записей TableChange по ней. Сервисы добавляют запись TableChange
+    в той же транзакции, что и изменение данных, поэтому версия
+    меняется атомарно с данными и общая для всех воркеров, а строка
+    версии не блокируется пишущими транзакциями.
+
+    Attributes:
+    -----------
+    name : str      Имя таблицы.
+    version : int   Количество свернутых изменений (+1), монотонно растет.
+    """
+    __tablename__ = 'table_version'
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+
+
+class TableChange(Base):
+    """
+    Изменение таблицы, еще не свернутое в TableVersion.version.
+
+    Attributes:
+    -----------
+    id : int    Номер изменения (по возрастанию).
+    name : str  Имя таблицы.
+    """
+    __tablename__ = 'table_change'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False, index=True)
+
+
+@event.listens_for(TableVersion.__table__, 'after_create')
+def _seed_versions(target, connection, **kw):
+    connection.execute(insert(target),
+                       [{'name': name, 'version': 1}
+                        for name in VERSIONED_TABLES])
+
+
+def bump_statement(*tables: str) -> Insert:
+    """Запрос, записывающий изменение переданных таблиц."""
+    return insert(TableChange).values([{'name': name} for name in tables])
+
+
+async def compact_versions(db: AsyncSession) -> None:
+    """
+    Сворачивание записей TableChange в счетчики TableVersion.
+
+    Строки версий, заблокированные другой транзакцией, пропускаются
+    (SKIP LOCKED), поэтому сворачивание никого не ждет: его сделает
+    следующая транзакция. Удаленные записи прибавляются к версии в той
+    же транзакции, поэтому сумма version + записи не меняется.
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    """
+    locked = await db.scalars(
+        select(TableVersion.name).with_for_update(skip_locked=True))
+    names = locked.all()
+    if not names:
+        return
+    result = await db.execute(
+        delete(TableChange).filter(TableChange.name.in_(names)).
+        returning(TableChange.name).
+        execution_options(synchronize_session=False))
+    for name, count in Counter(result.scalars()).items():
+        await db.execute(
+            update(TableVersion).filter(TableVersion.name == name).
+            values(version=TableVersion.version + count).
+            execution_options(synchronize_session=False))
+
+
+async def bump_versions(db: AsyncSession, *tables: str) -> None:
+    """
+    Изменение версии таблиц в текущей транзакции (вызывается до commit).
+
+    Изменение записывается вставкой строки, а не UPDATE общей строки
+    версии, поэтому параллельные записи в таблицу не выстраиваются
+    в очередь за блокировкой. Каждая VERSION_COMPACT_EVERY-я запись
+    сворачивает накопившиеся изменения (compact_versions).
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    tables : str        Имена измененных таблиц.
+    """
+    result = await db.execute(
+        insert(TableChange).returning(TableChange.id),
+        [{'name': name} for name in tables])
+    if any(change_id % VERSION_COMPACT_EVERY == 0
+           for change_id in result.scalars()):
+        await compact_versions(db)
+
+
+async def read_versions(db: AsyncSession, *tables: str) -> dict[str, int]:
+    """
+    Текущие версии таблиц одним запросом (версия и несвернутые изменения
+    читаются в одном снимке данных).
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    tables : str        Имена таблиц.
+
+    Returns:
+    --------
+    dict[str, int]  Версия каждой таблицы (0, если строки нет).
+    """
+    changes = (select(func.count(TableChange.id)).
+               filter(TableChange.name == TableVersion.name).
+               scalar_subquery())
+    result = await db.execute(
+        select(TableVersion.name, TableVersion.version + changes).
+        filter(TableVersion.name.in_(tables)))
+    versions = dict(result.all())
+    return {name: versions.get(name, 0) for name in tables}
+
+
+async def list_etag(db: AsyncSession, request: Request, *tables: str,
+                    state: str = '') -> str:
+    """
+    ETag списка: версии таблиц, из которых он строится, и параметры запроса.
+
+    Версии читаются до основного запроса, поэтому ответ может оказаться
+    новее своего ETag, но не наоборот.
+
+    Attributes:
+    -----------
+    db : AsyncSession   Сессия базы данных.
+    request : Request   Запрос (учитываются путь и параметры).
+    tables : str        Имена таблиц, из которых строится ответ.
+    state : str         Состояние, которое меняет ответ без записи
+                        в таблицы (например, истечение аренды).
+
+    Returns:
+    --------
+    str Слабый ETag.
+    """
+    versions = await read_versions(db, *tables)
+    key = '|'.join([request.url.path,
+                    str(sorted(request.query_params.multi_items())),
+                    *(f'{name}={version}'
+                      for name, version in versions.items()),
+                    state])
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверка заголовка If-None-Match (слабое сравнение)."""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(candidate.strip().removeprefix('W/') == opaque
+               for candidate in header.split(','))
+
+
+def not_modified(etag: str) -> Response:
+    """Ответ 304 без тела."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={'ETag': etag})
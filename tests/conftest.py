@@ -1,41 +1,48 @@
+import asyncio
 import atexit
 import os
 import uuid
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from main import app
-from src.db_connect import get_db
+from src.db_connect import get_db, get_sessionmaker
 from src.employee.model import Base
+from src.metrics import instrument_engine
 
 TEST_DB_DIR = os.path.join(os.path.dirname(__file__), 'test')
 if not os.path.exists(TEST_DB_DIR):
     os.mkdir(TEST_DB_DIR)
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(
-    autocommit=False,
+SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
+
+# TestClient запускает каждый запрос в своем цикле событий,
+# поэтому соединения не переиспользуются между запросами
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+instrument_engine(engine)
+TestingSessionLocal = async_sessionmaker(
+    bind=engine,
     autoflush=False,
-    bind=engine)
-Base.metadata.create_all(bind=engine)
+    expire_on_commit=False)
 
 
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+asyncio.run(create_tables())
+
+
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_sessionmaker] = lambda: TestingSessionLocal
 
 client = TestClient(app)
 
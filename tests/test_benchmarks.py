@@ -0,0 +1,21 @@
+from benchmarks.run import SCENARIOS, app_routes, compare
+from tests.conftest import app
+
+
+def _result(p50, p99, statements, errors=0):
+    return {"p50_ms": p50, "p99_ms": p99, "errors": errors,
+            "statements_per_request": statements}
+
+
+def test_every_route_has_benchmark_scenario():
+    assert app_routes(app) <= SCENARIOS.keys()
+
+
+def test_compare_flags_regressions():
+    baseline = {"routes": {"GET /tasks/": _result(10, 20, 1),
+                           "GET /": _result(10, 20, 1)}}
+    current = {"routes": {"GET /tasks/": _result(11, 21, 1),
+                          "GET /": _result(30, 20, 2)}}
+    regressions = compare(baseline, current, threshold=0.2)
+    assert len(regressions) == 2
+    assert all(regression.startswith("GET /:") for regression in regressions)
@@ -0,0 +1,60 @@
+import time
+
+from src.cache import LRUCache, response_cache
+from tests.conftest import client, create_test_task, create_test_employee
+
+
+def test_lru_cache_evicts_by_size_and_ttl():
+    cache = LRUCache(max_entries=2, ttl=0.05)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.evictions == 2
+
+
+def test_lru_cache_invalidates_by_tag_and_skips_stale_writes():
+    cache = LRUCache()
+    cache.set("task:1", b"task", tags=["employee:1"])
+    version = cache.version()
+    cache.invalidate("employee:1")
+    assert cache.get("task:1") is None
+
+    cache.set("task:1", b"stale", version=version)
+    assert cache.get("task:1") is None
+
+
+def test_task_card_is_cached_and_invalidated(create_test_task,
+                                             create_test_employee):
+    hits = response_cache.hits
+    first = client.get(f"/tasks/get/{create_test_task}")
+    second = client.get(f"/tasks/get/{create_test_task}")
+    assert first.json() == second.json()
+    assert response_cache.hits == hits + 1
+
+    client.get(f"/employees/get/{create_test_employee}")
+    response = client.patch(f"/tasks/update/{create_test_task}",
+                            params={"name": f"Renamed {create_test_task}",
+                                    "content": "Updated",
+                                    "employee_id": create_test_employee})
+    assert response.status_code == 200
+
+    task = client.get(f"/tasks/get/{create_test_task}").json()["task"]
+    assert task["name"] == f"Renamed {create_test_task}"
+    employee = client.get(f"/employees/get/{create_test_employee}").json()
+    assert [t["id"] for t in employee["employee"]["tasks"]] == [create_test_task]
+
+    response = client.patch(f"/employees/update/{create_test_employee}",
+                            params={"first_name": "Changed",
+                                    "last_name": "Employee",
+                                    "email": f"{create_test_employee}@example.com"})
+    assert response.status_code == 200
+    task = client.get(f"/tasks/get/{create_test_task}").json()["task"]
+    assert task["employees"]["first_name"] == "Changed"
+
+    assert "response_cache_hits_total" in client.get("/metrics").text
@@ -0,0 +1,32 @@
+from sqlalchemy import create_engine, func, select
+
+from src.datagen import DatasetSpec, generate_tasks, load_dataset
+from src.employee.model import Employee
+from src.tasks.model import Task
+
+
+def test_generate_tasks_is_reproducible():
+    spec = DatasetSpec(employees=10, tasks=200, seed=7)
+    assert list(generate_tasks(spec)) == list(generate_tasks(spec))
+    other = DatasetSpec(employees=10, tasks=200, seed=8)
+    assert list(generate_tasks(spec)) != list(generate_tasks(other))
+
+
+def test_generate_tasks_builds_bounded_hierarchy():
+    spec = DatasetSpec(employees=10, tasks=2000, seed=1, max_depth=4)
+    depth = {}
+    for task in generate_tasks(spec):
+        depth[task["id"]] = (depth[task["parent_id"]] + 1
+                             if task["parent_id"] else 0)
+        assert depth[task["id"]] < spec.max_depth
+        assert task["status"] == (1 if task["employee_id"] else 0)
+    assert max(depth.values()) == spec.max_depth - 1
+
+
+def test_load_dataset_into_sqlite():
+    engine = create_engine("sqlite://")
+    load_dataset(engine, DatasetSpec(employees=20, tasks=500, seed=3),
+                 batch_size=100)
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Employee)) == 20
+        assert conn.scalar(select(func.count()).select_from(Task)) == 500
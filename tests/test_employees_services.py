@@ -1,4 +1,12 @@
-from tests.conftest import client, create_test_employee
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from src.employee.model import DrainJob, JOB_DONE, JOB_RUNNING
+from src.tasks.workload import workload_index
+from tests.conftest import TestingSessionLocal, client, create_test_employee
 
 
 def test_create_employee(create_test_employee):
@@ -25,3 +33,225 @@ def test_get_employees_free():
         response_json = response.json()
         assert "detail" in response_json
         assert response_json["detail"] == 'Сотрудников без заданий не найдено'
+
+
+def test_get_employees_busy_counts_tasks(create_test_employee):
+    employee_id = create_test_employee
+    for _ in range(2):
+        response = client.post("/tasks/create/", json={
+            "name": f"Busy Task {uuid.uuid4()}",
+            "content": "This is a test task",
+            "employee_id": employee_id
+        })
+        assert response.status_code == 201
+
+    response = client.get("/employees/busy")
+    assert response.status_code == 200
+    employees = response.json()["employees"]
+    counts = [employee["task_count"] for employee in employees]
+    assert counts == sorted(counts, reverse=True)
+    busy = {employee["id"]: employee["task_count"] for employee in employees}
+    assert busy[employee_id] == 2
+
+    response = client.get("/employees/free")
+    if response.status_code == 200:
+        free_ids = [employee["id"] for employee in response.json()["employees"]]
+        assert employee_id not in free_ids
+
+
+def test_root_paginates_workload():
+    response = client.get("/", params={"limit": 1, "page": 1})
+    assert response.status_code == 200
+    assert response.json()["results"] <= 1
+
+
+def test_create_employees_bulk_reports_row_errors():
+    email = f"bulk{uuid.uuid4()}@example.com"
+    payload = [
+        {"first_name": "Bulk", "last_name": "Employee", "email": email},
+        {"first_name": "Bulk", "last_name": "Employee", "email": email},
+        {"first_name": "Bulk", "last_name": "Employee", "email": "not-an-email"},
+    ]
+    response = client.post("/employees/bulk", json=payload)
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["results"] == 1
+    assert [error["index"] for error in response_json["errors"]] == [1, 2]
+
+
+def test_busy_etag_changes_with_tasks(create_test_employee):
+    etag = client.get("/employees/busy").headers["etag"]
+    assert client.get("/employees/busy",
+                      headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/tasks/create/", json={
+        "name": f"Busy Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    })
+    response = client.get("/employees/busy", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert create_test_employee in [e["id"] for e in response.json()["employees"]]
+
+
+def test_offboard_employees(create_test_employee):
+    free_employee = client.post("/employees/create", json={
+        "first_name": "Free",
+        "last_name": "Employee",
+        "email": f"{uuid.uuid4()}@example.com"
+    }).json()["employee"]["id"]
+    client.post("/tasks/create/", json={
+        "name": f"Offboard Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    })
+    missing = str(uuid.uuid4())
+
+    response = client.post("/employees/offboard", json={
+        "employee_ids": [free_employee, create_test_employee, missing]})
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["deleted"] == [free_employee]
+    assert response_json["has_tasks"] == [create_test_employee]
+    assert response_json["not_found"] == [missing]
+    assert client.get(f"/employees/get/{free_employee}").status_code == 404
+
+
+def test_drain_employee(create_test_employee):
+    other_employee = client.post("/employees/create", json={
+        "first_name": "Other",
+        "last_name": "Employee",
+        "email": f"{uuid.uuid4()}@example.com"
+    }).json()["employee"]["id"]
+    task_ids = [client.post("/tasks/create/", json={
+        "name": f"Drain Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    }).json()["task"]["id"] for _ in range(3)]
+
+    response = client.post(f"/employees/{create_test_employee}/drain")
+    assert response.status_code == 202
+    job = response.json()["job"]
+    assert job["total"] == 3
+
+    # Фоновое задание TestClient выполняет до возврата ответа
+    job = client.get(f"/employees/drain/{job['id']}").json()["job"]
+    assert (job["status"], job["moved"]) == ("done", 3)
+    for task_id in task_ids:
+        task = client.get(f"/tasks/get/{task_id}").json()["task"]
+        assert task["employee_id"] not in (create_test_employee, None)
+    assert client.get(f"/employees/get/{other_employee}").status_code == 200
+    assert client.delete(f"/employees/del/{create_test_employee}").status_code == 200
+    assert client.get(f"/employees/drain/{uuid.uuid4()}").status_code == 404
+
+
+def test_draining_employee_gets_no_new_tasks():
+    draining = client.post("/employees/create", json={
+        "first_name": "Draining",
+        "last_name": "Employee",
+        "email": f"{uuid.uuid4()}@example.com"
+    }).json()["employee"]["id"]
+    job_id = uuid.uuid4()
+
+    async def set_job(**values):
+        async with TestingSessionLocal() as db:
+            if not values:
+                now = datetime.now(timezone.utc)
+                db.add(DrainJob(id=job_id, employee_id=uuid.UUID(draining),
+                                created_at=now, updated_at=now))
+            else:
+                await db.execute(update(DrainJob).
+                                 filter(DrainJob.id == job_id).values(**values))
+            await db.commit()
+
+    async def warm_up():
+        async with TestingSessionLocal() as db:
+            await workload_index.warm_up(db)
+
+    # Задание создано в обход API (как другим воркером) после прогрева:
+    # индекс загруженности этого процесса о нем не знает
+    asyncio.run(warm_up())
+    asyncio.run(set_job())
+    free = client.get("/employees/free").json().get("employees", [])
+    assert draining not in [employee["id"] for employee in free]
+    # Без исключения сотрудник без задач получил бы задачу первым
+    client.post("/tasks/bulk", json=[{
+        "name": f"Busy Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": employee["id"]
+    } for employee in free])
+
+    task_ids = [client.post("/tasks/create/", json={
+        "name": f"Unassigned Task {uuid.uuid4()}",
+        "content": "This is a test task"
+    }).json()["task"]["id"] for _ in range(2)]
+    response = client.patch(f"/tasks/set_employee/{task_ids[0]}")
+    assert response.json()["task"]["employee_id"] != draining
+    response = client.patch("/tasks/set_employee/batch",
+                            json={"task_ids": task_ids[1:]})
+    assert draining not in [assignment["employee_id"]
+                            for assignment in response.json()["assignments"]]
+
+    asyncio.run(set_job(status=JOB_DONE))
+    free = client.get("/employees/free").json()["employees"]
+    assert draining in [employee["id"] for employee in free]
+
+
+def test_drain_job_with_expired_lease_is_replaced(create_test_employee):
+    stale_id = uuid.uuid4()
+
+    async def add_job(job_id, updated_at):
+        async with TestingSessionLocal() as db:
+            db.add(DrainJob(id=job_id,
+                            employee_id=uuid.UUID(create_test_employee),
+                            status=JOB_RUNNING, created_at=updated_at,
+                            updated_at=updated_at))
+            await db.commit()
+
+    # Воркер остановлен во время задания: аренда истекла, сотрудник
+    # снова виден в списках загруженности
+    asyncio.run(add_job(stale_id,
+                        datetime.now(timezone.utc) - timedelta(hours=1)))
+    client.post("/tasks/create/", json={
+        "name": f"Stale Drain Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    })
+    busy = client.get("/employees/busy").json()["employees"]
+    assert create_test_employee in [employee["id"] for employee in busy]
+
+    response = client.post(f"/employees/{create_test_employee}/drain")
+    assert response.status_code == 202
+    job = client.get(f"/employees/drain/{response.json()['job']['id']}")
+    assert job.json()["job"]["status"] == "done"
+    stale = client.get(f"/employees/drain/{stale_id}").json()["job"]
+    assert stale["status"] == "failed"
+
+    # Пока аренда задания не истекла, второе задание не создается
+    asyncio.run(add_job(uuid.uuid4(), datetime.now(timezone.utc)))
+    response = client.post(f"/employees/{create_test_employee}/drain")
+    assert response.status_code == 409
+
+
+def test_drain_job_changes_workload_etag(create_test_employee):
+    client.post("/tasks/create/", json={
+        "name": f"Etag Drain Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    })
+    etag = client.get("/").headers["etag"]
+    job_id = uuid.uuid4()
+
+    async def add_job():
+        async with TestingSessionLocal() as db:
+            now = datetime.now(timezone.utc)
+            db.add(DrainJob(id=job_id, employee_id=uuid.UUID(create_test_employee),
+                            created_at=now, updated_at=now))
+            await db.commit()
+
+    # Задание, созданное без записи в версии таблиц, все равно меняет ETag
+    asyncio.run(add_job())
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert create_test_employee not in [
+        employee["id"] for employee in response.json()["employees"]]
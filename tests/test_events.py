@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+
+from src.events import EventBroker, event_broker, sse_stream
+from tests.conftest import client
+
+
+def test_events_websocket_resume_and_filter(create_test_employee):
+    last_event_id = event_broker.last_event_id()
+    task_id = client.post("/tasks/create/", json={
+        "name": f"Event Task {uuid.uuid4()}", "content": "События",
+        "employee_id": create_test_employee}).json()["task"]["id"]
+    client.post("/tasks/create/", json={
+        "name": f"Other Task {uuid.uuid4()}", "content": "События"})
+    client.delete(f"/tasks/del/{task_id}")
+
+    with client.websocket_connect(
+            f"/events/ws?last_event_id={last_event_id}"
+            f"&employee_id={create_test_employee}") as websocket:
+        created = websocket.receive_json()
+        deleted = websocket.receive_json()
+
+    assert (created["type"], created["ids"]) == ("task.created", [task_id])
+    assert create_test_employee in created["employee_ids"]
+    assert (deleted["type"], deleted["ids"]) == ("task.deleted", [task_id])
+    assert event_broker.subscribers == 0
+
+
+def test_events_sse_stream():
+    last_event_id = event_broker.last_event_id()
+    employee_id = client.post("/employees/create", json={
+        "first_name": "Event", "last_name": "Employee",
+        "email": f"{uuid.uuid4()}@example.com"}).json()["employee"]["id"]
+
+    async def first_message():
+        stream = sse_stream(last_event_id, None)
+        message = await stream.__anext__()
+        await stream.aclose()
+        return message
+
+    message = asyncio.run(first_message()).decode()
+    assert message.startswith(f"id: {last_event_id + 1}\nevent: employee.created\n")
+    assert employee_id in message
+
+
+def test_event_broker_reports_lost_events():
+    broker = EventBroker(buffer_size=2)
+    for _ in range(3):
+        broker.publish("task.updated", [], [])
+    assert [item["id"] for item in broker.since(2)] == [3]
+    assert broker.since(1) is None
+
+
+def test_event_broker_resets_resume_before_first_event():
+    # Воркер подключился к ленте, когда номера событий дошли до 600
+    broker = EventBroker()
+    for event_id in (600, 601, 602):
+        broker.publish("task.updated", [], [], event_id)
+    assert broker.since(500) is None
+    assert [item["id"] for item in broker.since(599)] == [600, 601, 602]
+    assert [item["id"] for item in broker.since(600)] == [601, 602]
+
+
+def test_event_broker_new_subscriber_before_first_event():
+    broker = EventBroker()
+
+    async def first_item():
+        stream = broker.subscribe(heartbeat=1)
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        broker.publish("task.updated", [], [], 600)
+        item = await pending
+        await stream.aclose()
+        return item
+
+    assert asyncio.run(first_item())["id"] == 600
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src import metrics
+from src.cache import response_cache
+from src.metrics import RequestStats, _current_stats, instrument_engine
+from tests.conftest import client, create_test_task
+
+
+def test_server_timing_header_counts_statements(create_test_task):
+    response_cache.clear()
+    response = client.get(f"/tasks/get/{create_test_task}")
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    assert "db;dur=" in server_timing
+    # Задача с родителем и сотрудником (JOIN) и подзадачи (selectin);
+    # кэш ответа очищен, чтобы задача читалась из БД
+    assert "statements=2 " in server_timing
+
+
+def test_metrics_endpoint_exposes_route_histograms(create_test_task):
+    client.get("/tasks/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert ('db_statements_per_request_count{route="/tasks/",method="GET"}'
+            in response.text)
+
+
+def test_pool_status_endpoint(create_test_task, monkeypatch):
+    # Без настроенного токена служебный роут не опубликован
+    assert client.get("/metrics/pool").status_code == 404
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "secret")
+    assert client.get("/metrics/pool").status_code == 403
+    assert client.get("/metrics/pool",
+                      headers={"X-Metrics-Token": "wrong"}).status_code == 403
+
+    response = client.get("/metrics/pool",
+                          headers={"X-Metrics-Token": "secret"})
+    assert response.status_code == 200
+    pools = response.json()["pools"]
+    assert any(pool["wait"]["count"] > 0 for pool in pools)
+    assert "db_pool_wait_count_total" in client.get("/metrics").text
+
+
+def test_failed_statement_does_not_skew_timings():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            # Ошибка не оставляет время начала запроса на соединении
+            assert not conn.info
+    finally:
+        _current_stats.reset(token)
+    assert stats.statements == 1
+    assert 0 <= stats.db_time < 1
@@ -0,0 +1,75 @@
+import os
+import uuid
+
+from sqlalchemy import create_engine, inspect, text
+
+from src.migrations import is_migrated, migrate
+from src.tasks.counters import repair_task_counts
+
+
+def test_migrate_adds_missing_objects_once(tmp_path):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_path, 'migrate.db')}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE employee (id CHAR(32) PRIMARY KEY, "
+            "email VARCHAR NOT NULL UNIQUE, last_name VARCHAR NOT NULL, "
+            "first_name VARCHAR NOT NULL, patronymic VARCHAR)"))
+
+    assert not is_migrated(engine)
+    assert migrate(engine)
+    assert is_migrated(engine)
+    assert not migrate(engine)
+
+    inspector = inspect(engine)
+    assert "post" in {column["name"] for column in inspector.get_columns("employee")}
+    assert "ix_task_period_of_execution_id" in {
+        index["name"] for index in inspector.get_indexes("task")}
+    assert "task_fts" in inspector.get_table_names()
+
+
+def test_task_count_triggers_and_repair(tmp_path):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_path, 'counts.db')}")
+    migrate(engine)
+    employee_id, other_id = uuid.uuid4().hex, uuid.uuid4().hex
+    with engine.begin() as conn:
+        for pk in (employee_id, other_id):
+            conn.execute(text(
+                "INSERT INTO employee (id, email, last_name, first_name) "
+                "VALUES (:id, :id, 'Test', 'Employee')"), {"id": pk})
+        for name in ("first", "second"):
+            conn.execute(text(
+                "INSERT INTO task (id, name, content, status, employee_id) "
+                "VALUES (:id, :name, '', 1, :employee_id)"),
+                {"id": uuid.uuid4().hex, "name": name, "employee_id": employee_id})
+        conn.execute(text("UPDATE task SET employee_id = :other_id WHERE name = 'first'"),
+                     {"other_id": other_id})
+        conn.execute(text("DELETE FROM task WHERE name = 'second'"))
+
+    def counts():
+        with engine.connect() as conn:
+            return dict(conn.execute(text(
+                "SELECT id, active_task_count FROM employee")).all())
+
+    assert counts() == {employee_id: 0, other_id: 1}
+
+    # Учитываются только незавершенные задачи
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE task SET status = 2 WHERE name = 'first'"))
+        conn.execute(text(
+            "INSERT INTO task (id, name, content, status, employee_id) "
+            "VALUES (:id, 'done', '', 2, :employee_id)"),
+            {"id": uuid.uuid4().hex, "employee_id": employee_id})
+    assert counts() == {employee_id: 0, other_id: 0}
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE task SET status = 1 WHERE name = 'first'"))
+        conn.execute(text("DELETE FROM task WHERE name = 'done'"))
+    assert counts() == {employee_id: 0, other_id: 1}
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO task (id, name, content, status, employee_id) "
+            "VALUES (:id, 'done', '', 2, :employee_id)"),
+            {"id": uuid.uuid4().hex, "employee_id": employee_id})
+        conn.execute(text("UPDATE employee SET active_task_count = 5"))
+        assert repair_task_counts(conn) == 2
+    assert counts() == {employee_id: 0, other_id: 1}
@@ -1,4 +1,10 @@
-from tests.conftest import client, create_test_task
+import asyncio
+import json
+import uuid
+
+from src.tasks.search import search_query
+from tests.conftest import (TestingSessionLocal, client, create_test_task,
+                            create_test_employee)
 
 
 def test_create_task(create_test_task):
@@ -30,3 +36,315 @@ def test_get_free_tasks():
     response_json = response.json()
     assert "status" in response_json
     assert response_json["status"] == "success"
+
+
+def test_set_employee_important_task(create_test_task, create_test_employee):
+    response = client.patch(f"/tasks/set_employee/{create_test_task}")
+    assert response.status_code == 200
+    task = response.json()["task"]
+    assert task["status"] == 1
+    assert task["employee_id"] is not None
+
+
+def test_set_employee_prefers_parent_employee(create_test_employee):
+    parent = client.post("/tasks/create/", json={
+        "name": f"Parent Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    }).json()["task"]
+    child = client.post("/tasks/create/", json={
+        "name": f"Child Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "parent_id": parent["id"]
+    }).json()["task"]
+    # Свободный сотрудник получил бы задачу первым: всем свободным
+    # сотрудникам назначается по задаче
+    free = client.get("/employees/free").json().get("employees", [])
+    response = client.post("/tasks/bulk", json=[{
+        "name": f"Busy Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": employee["id"]
+    } for employee in free])
+    assert response.json()["results"] == len(free)
+    assert client.get("/employees/free").status_code == 404
+
+    response = client.patch(f"/tasks/set_employee/{child['id']}")
+    assert response.status_code == 200
+    assert response.json()["task"]["employee_id"] == create_test_employee
+
+
+def test_set_employee_batch(create_test_task, create_test_employee):
+    missing_id = str(uuid.uuid4())
+    response = client.patch("/tasks/set_employee/batch", json={
+        "task_ids": [create_test_task, missing_id]
+    })
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["results"] == 1
+    assert response_json["assignments"][0]["task_id"] == create_test_task
+    assert response_json["not_found"] == [missing_id]
+
+    task = client.get(f"/tasks/get/{create_test_task}").json()["task"]
+    assert task["status"] == 1
+    assert task["employee_id"] == response_json["assignments"][0]["employee_id"]
+
+
+def test_set_employee_batch_requires_target():
+    response = client.patch("/tasks/set_employee/batch", json={})
+    assert response.status_code == 422
+
+
+def test_get_tasks_cursor_pagination(create_test_task):
+    for day in (1, 2):
+        client.post("/tasks/create/", json={
+            "name": f"Dated Task {uuid.uuid4()}",
+            "content": "This is a test task",
+            "period_of_execution": f"2024-01-0{day}"
+        })
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/tasks/", params=params)
+        assert response.status_code == 200
+        response_json = response.json()
+        seen.extend(task["id"] for task in response_json["tasks"])
+        cursor = response_json["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen))
+    assert create_test_task in seen
+    # Курсоры проходят задачи в том же порядке, что и одна большая страница
+    response = client.get("/tasks/", params={"limit": len(seen) + 1})
+    assert seen == [task["id"] for task in response.json()["tasks"]]
+
+
+def test_get_tasks_invalid_cursor():
+    response = client.get("/tasks/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_get_important_tasks_filters_in_query(create_test_employee):
+    parent = client.post("/tasks/create/", json={
+        "name": f"Parent Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    }).json()["task"]
+    child = client.post("/tasks/create/", json={
+        "name": f"Child Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "parent_id": parent["id"]
+    }).json()["task"]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        response_json = client.get("/tasks/important/", params=params).json()
+        for task in response_json["tasks"]:
+            assert task["status"] == 0
+            assert task["parent_task"]["status"] == 1
+        seen.extend(task["id"] for task in response_json["tasks"])
+        cursor = response_json["next_cursor"]
+        if cursor is None:
+            break
+        assert response_json["results"] == 1
+
+    assert child["id"] in seen
+
+
+def test_create_tasks_bulk_ndjson(create_test_employee):
+    names = [f"Bulk Task {uuid.uuid4()}" for _ in range(3)]
+    lines = [
+        json.dumps({"name": names[0], "content": "c",
+                    "employee_id": create_test_employee}),
+        json.dumps({"name": names[1], "content": "c"}),
+        json.dumps({"name": names[2], "content": "c",
+                    "parent_id": str(uuid.uuid4())}),
+        json.dumps({"name": names[0], "content": "c"}),
+    ]
+    response = client.post("/tasks/bulk", content="\n".join(lines),
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 201
+    response_json = response.json()
+    assert response_json["results"] == 2
+    assert [error["index"] for error in response_json["errors"]] == [2, 3]
+
+    busy = client.get("/employees/busy").json()["employees"]
+    counts = {employee["id"]: employee["task_count"] for employee in busy}
+    assert counts[create_test_employee] == 1
+
+
+def test_export_tasks_ndjson_and_csv(create_test_task):
+    response = client.get("/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert create_test_task in {row["id"] for row in rows}
+
+    response = client.get("/tasks/export", params={"format": "csv"})
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0].split(",")[0] == "id"
+    assert len(lines) == len(rows) + 1
+
+    response = client.get("/tasks/export", params={"format": "xml"})
+    assert response.status_code == 400
+
+
+def test_get_task_loads_relations_explicitly(create_test_employee):
+    parent = client.post("/tasks/create/", json={
+        "name": f"Parent Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "employee_id": create_test_employee
+    }).json()["task"]
+    child = client.post("/tasks/create/", json={
+        "name": f"Child Task {uuid.uuid4()}",
+        "content": "This is a test task",
+        "parent_id": parent["id"]
+    }).json()["task"]
+
+    task = client.get(f"/tasks/get/{parent['id']}").json()["task"]
+    assert task["employees"]["id"] == create_test_employee
+    assert [c["id"] for c in task["child_task"]] == [child["id"]]
+
+    listed = client.get("/tasks/free/").json()["tasks"]
+    assert all("child_task" not in t and "employees" not in t for t in listed)
+
+
+def test_task_subtree_and_ancestors(create_test_employee):
+    def create(parent_id=None, employee_id=None):
+        return client.post("/tasks/create/", json={
+            "name": f"Tree Task {uuid.uuid4()}",
+            "content": "This is a test task",
+            "parent_id": parent_id,
+            "employee_id": employee_id
+        }).json()["task"]["id"]
+
+    root = create(employee_id=create_test_employee)
+    child = create(parent_id=root)
+    grandchild = create(parent_id=child)
+    create(parent_id=root)
+
+    response = client.get(f"/tasks/{root}/subtree")
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["results"] == 4
+    assert response_json["rollup"] == {"total": 4,
+                                       "statuses": {"0": 3, "1": 1}}
+    depths = {task["id"]: task["depth"] for task in response_json["tasks"]}
+    assert depths[root] == 0 and depths[grandchild] == 2
+
+    response = client.get(f"/tasks/{root}/subtree",
+                          params={"max_depth": 1, "include_tasks": False})
+    assert response.json()["rollup"]["total"] == 3
+    assert "tasks" not in response.json()
+
+    response = client.get(f"/tasks/{grandchild}/ancestors")
+    assert [task["id"] for task in response.json()["tasks"]] == [child, root]
+
+    response = client.get(f"/tasks/{uuid.uuid4()}/subtree")
+    assert response.status_code == 404
+
+
+def test_tasks_list_conditional_get(create_test_task):
+    response = client.get("/tasks/")
+    etag = response.headers["etag"]
+
+    response = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.delete(f"/tasks/del/{create_test_task}")
+    response = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_update_task_without_relations(create_test_task, create_test_employee):
+    response = client.patch(f"/tasks/update/{create_test_task}",
+                            params={"name": f"Returning {create_test_task}",
+                                    "content": "Updated",
+                                    "employee_id": create_test_employee,
+                                    "with_relations": False})
+    assert response.status_code == 200
+    task = response.json()["task"]
+    assert task["employee_id"] == create_test_employee
+    assert "child_task" not in task
+
+    response = client.patch(f"/tasks/update/{uuid.uuid4()}",
+                            params={"name": "Missing", "content": "Missing"})
+    assert response.status_code == 404
+
+
+def test_search_tasks():
+    marker = uuid.uuid4().hex[:12]
+    client.post("/tasks/create/", json={
+        "name": f"Отчет {marker}", "content": "Подготовить квартальный отчет"})
+    client.post("/tasks/create/", json={
+        "name": f"Задача {uuid.uuid4()}",
+        "content": f"Упомянуть {marker} в тексте задачи"})
+
+    response = client.get("/tasks/search", params={"q": marker})
+    assert response.status_code == 200
+    tasks = response.json()["tasks"]
+    assert len(tasks) == 2
+    # Совпадение в названии релевантнее совпадения в содержании
+    assert tasks[0]["name"] == f"Отчет {marker}"
+    assert tasks[0]["rank"] >= tasks[1]["rank"]
+    assert f"<b>{marker}</b>" in tasks[1]["snippet"]
+
+    response = client.get("/tasks/search", params={"q": f"{marker} -*\""})
+    assert response.status_code == 200
+    assert client.get("/tasks/search", params={"q": "!!!"}).json()["tasks"] == []
+
+
+def test_search_tasks_like_fallback():
+    marker = uuid.uuid4().hex[:12]
+    for name, content in ((f"Отчет {marker}", "Квартальный"),
+                          (f"Задача {uuid.uuid4()}", f"Про {marker}_%")):
+        client.post("/tasks/create/", json={"name": name, "content": content})
+
+    async def search(q):
+        async with TestingSessionLocal() as db:
+            query = search_query("mysql", q, 10)
+            return (await db.execute(query)).all()
+
+    tasks = asyncio.run(search(marker.upper()))
+    assert [task.name for task in tasks][0] == f"Отчет {marker}"
+    assert len(tasks) == 2
+    assert search_query("mysql", "%%", 10) is None
+
+
+def test_due_tasks(create_test_employee):
+    def create(period, task_status=0):
+        response = client.post("/tasks/create/", json={
+            "name": f"Due Task {uuid.uuid4()}", "content": "Срок",
+            "period_of_execution": period, "status": task_status,
+            "employee_id": create_test_employee})
+        return response.json()["task"]["id"]
+
+    overdue = create("2020-01-01T00:00:00")
+    create("2020-02-01T00:00:00", task_status=2)
+    due_soon = create("2999-01-01T00:00:00")
+    params = {"employee_id": create_test_employee}
+
+    response = client.get("/tasks/due", params={**params, "overdue": True})
+    assert [task["id"] for task in response.json()["tasks"]] == [overdue]
+    assert "ETag" not in response.headers
+
+    response = client.get("/tasks/due", params={**params, "limit": 1})
+    assert [task["id"] for task in response.json()["tasks"]] == [overdue]
+    response = client.get("/tasks/due", params={
+        **params, "limit": 1, "cursor": response.json()["next_cursor"]})
+    assert [task["id"] for task in response.json()["tasks"]] == [due_soon]
+
+    response = client.get("/tasks/due", params={
+        **params, "after": "2021-01-01T00:00:00", "counts_only": True})
+    assert response.json()["rollup"] == {"total": 1, "statuses": {"1": 1}}
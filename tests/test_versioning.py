@@ -0,0 +1,26 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from src import versioning
+from src.versioning import TableChange, bump_versions, read_versions
+from tests.conftest import TestingSessionLocal
+
+
+def test_bump_versions_counts_every_change_across_compaction(monkeypatch):
+    monkeypatch.setattr(versioning, "VERSION_COMPACT_EVERY", 2)
+
+    async def run():
+        async with TestingSessionLocal() as db:
+            before = await read_versions(db, "task", "employee")
+            for _ in range(5):
+                await bump_versions(db, "task")
+                await db.commit()
+            after = await read_versions(db, "task", "employee")
+            pending = await db.scalar(select(func.count(TableChange.id)))
+            return before, after, pending
+
+    before, after, pending = asyncio.run(run())
+    assert after == {"task": before["task"] + 5, "employee": before["employee"]}
+    # Изменения свернуты в версию, а не копятся
+    assert pending < 2